@@ -1,5 +1,6 @@
 import logging
 import pandas as pd
+from helpers.instrumentation_helpers import instrument, add_rows, dump_metrics
 from helpers import RAW_OSCARS_FILE, RAW_RAZZIES_FILE, PRO_MOVIES_AWARDS_FILE
 
 
@@ -22,11 +23,13 @@ def clean_razzies(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+@instrument()
 def process_awards(df_oscars: pd.DataFrame, df_razzies: pd.DataFrame) -> None:
     df_awards = pd.concat([df_oscars, df_razzies], axis=0)
     logging.info("Data processing complete. Saving to file...")
 
     df_awards["WINNER"] = df_awards["WINNER"].astype(bool)
+    add_rows(len(df_awards))
     df_awards.to_parquet(PRO_MOVIES_AWARDS_FILE, index=False)
     logging.info("Data successfully processed and saved to %s", PRO_MOVIES_AWARDS_FILE)
 
@@ -67,6 +70,8 @@ def main():
         process_awards(df_oscars, df_razzies)
     except Exception as e:
         logging.exception(f"An error occurred during the script execution: {e}")
+    finally:
+        dump_metrics("cleaner_awards")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,489 @@
+import os
+import sys
+import time
+import logging
+import tempfile
+import requests
+from pathlib import Path
+from unittest import mock
+from typing import Callable, Dict, List
+from bs4 import BeautifulSoup
+import BOMOJO_scraper
+import BOMOJO_cleaner
+from BOMOJO_scraper import fetch_movie_data
+from BOMOJO_cleaner import (
+    load_mappings,
+    normalize_country_names,
+    classify_region,
+    convert_currency_to_int,
+)
+from helpers.web_scraping_helpers import table_to_dataframe, get_href_table
+from helpers.instrumentation_helpers import dump_metrics
+from helpers.scheduling_helpers import AdaptiveScheduler
+from helpers.benchmark_helpers import (
+    SCALES,
+    ROWS_PER_PAGE,
+    BenchmarkResult,
+    FakeSnowflakeDatabase,
+    LocalFixtureServer,
+    build_title_page,
+    build_listing_page,
+    build_countries_frame,
+    build_currency_frame,
+    build_releases_frame,
+    write_raw_country_csvs,
+    write_processed_parquets,
+    measure_import_time,
+    run_benchmark,
+    load_baselines,
+    save_baselines,
+    find_host_mismatches,
+    find_regressions,
+)
+from helpers import (
+    BENCHMARK_FIXTURES_DIR,
+    BENCHMARK_BASELINES_FILE,
+    COUNTRY_REGION_MAPPINGS,
+)
+
+ENTRY_POINTS = ["BOMOJO_scraper", "BOMOJO_cleaner", "AWARDS_cleaner", "DATA_loader"]
+HEAVY_MODULES = ["pandas", "numpy", "bs4", "snowflake.connector"]
+
+RECORDED_LISTINGS = {
+    "franchises.html": (
+        "https://www.boxofficemojo.com/franchise/?ref_=bo_nb_gs_secondarytab",
+        "franchise/fr",
+    ),
+    "brands.html": (
+        "https://www.boxofficemojo.com/brand/?ref_=bo_nb_frs_secondarytab",
+        "brand/bn",
+    ),
+}
+
+
+def bench_scraper(rows: int, repeat: int) -> List[BenchmarkResult]:
+    results = []
+    pages = max(1, rows // ROWS_PER_PAGE)
+    page_rows = min(rows, ROWS_PER_PAGE)
+
+    fixtures = {"/title/synthetic/": build_title_page(page_rows).encode("utf-8")}
+    recorded_titles = sorted(BENCHMARK_FIXTURES_DIR.glob("title_*.html"))
+    for fixture in recorded_titles:
+        fixtures[f"/title/{fixture.stem}/"] = fixture.read_bytes()
+
+    # The politeness delay is meant for the real site, not the local fixtures
+    no_delay_scheduler = AdaptiveScheduler(min_delay=0.0)
+    with LocalFixtureServer(fixtures) as server, mock.patch.object(
+        BOMOJO_scraper, "_scheduler", no_delay_scheduler
+    ):
+
+        def fetch_and_parse(paths: List[str]) -> int:
+            parsed_rows = 0
+            for path in paths:
+                for table in fetch_movie_data(server.url(path)) or []:
+                    parsed_rows += len(table_to_dataframe(table))
+            return parsed_rows
+
+        results.append(
+            run_benchmark(
+                "fetch_movie_data+table_to_dataframe",
+                lambda: fetch_and_parse(["/title/synthetic/"] * pages),
+                repeat,
+            )
+        )
+        if recorded_titles:
+            recorded_paths = [f"/title/{fixture.stem}/" for fixture in recorded_titles]
+            results.append(
+                run_benchmark(
+                    "fetch_movie_data+table_to_dataframe[recorded]",
+                    lambda: fetch_and_parse(recorded_paths),
+                    repeat,
+                )
+            )
+
+    listing = BeautifulSoup(build_listing_page(page_rows, "release/rl"), "html.parser")
+
+    def scan_listing() -> int:
+        for _ in range(pages):
+            get_href_table(listing, "release/rl")
+        return pages * page_rows
+
+    results.append(run_benchmark("get_href_table", scan_listing, repeat))
+
+    for file_name, (_, key_word) in RECORDED_LISTINGS.items():
+        fixture = BENCHMARK_FIXTURES_DIR / file_name
+        if not fixture.exists():
+            continue
+        soup = BeautifulSoup(fixture.read_text(encoding="utf-8"), "html.parser")
+        results.append(
+            run_benchmark(
+                f"get_href_table[{fixture.stem}]",
+                lambda soup=soup, key_word=key_word: len(
+                    get_href_table(soup, key_word)
+                ),
+                repeat,
+            )
+        )
+
+    return results
+
+
+def bench_cleaner(rows: int, repeat: int) -> List[BenchmarkResult]:
+    results = []
+    country_mapping, market_regions = load_mappings(COUNTRY_REGION_MAPPINGS)
+
+    df_countries = build_countries_frame(rows, market_regions)
+
+    def normalize_and_classify() -> int:
+        df = normalize_country_names(df_countries.copy(), "AREA", country_mapping)
+        return len(classify_region(df, "AREA", market_regions))
+
+    results.append(
+        run_benchmark(
+            "normalize_country_names+classify_region", normalize_and_classify, repeat
+        )
+    )
+
+    df_currency = build_currency_frame(rows)
+    results.append(
+        run_benchmark(
+            "convert_currency_to_int",
+            lambda: len(convert_currency_to_int(df_currency.copy(), "WORLDWIDE")),
+            repeat,
+        )
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        areas_file = Path(tmp_dir) / "BOMOJO_MOVIES_AREAS.csv"
+        regions_file = Path(tmp_dir) / "BOMOJO_MOVIES_REGIONS.csv"
+        countries_file = Path(tmp_dir) / "BOMOJO_MOVIES_COUNTRIES.parquet"
+        write_raw_country_csvs(rows, market_regions, areas_file, regions_file)
+
+        def process_countries() -> int:
+            countries_file.unlink(missing_ok=True)
+            BOMOJO_cleaner.process_countries(country_mapping, market_regions)
+            if not countries_file.exists():
+                raise RuntimeError("process_countries did not produce an output file")
+            return rows
+
+        with mock.patch.multiple(
+            BOMOJO_cleaner,
+            RAW_BOMOJO_MOVIES_AREAS_FILE=areas_file,
+            RAW_BOMOJO_MOVIES_REGIONS_FILE=regions_file,
+            PRO_BOMOJO_COUNTRIES_FILE=countries_file,
+        ):
+            results.append(
+                run_benchmark("process_countries", process_countries, repeat)
+            )
+
+    return results
+
+
+def bench_loader(rows: int, repeat: int) -> List[BenchmarkResult]:
+    db = FakeSnowflakeDatabase("", "", "", "", "", "")
+    df_releases = build_releases_frame(rows)
+
+    def load() -> int:
+        db.load_data(df_releases, "BOMOJO_RELEASES")
+        return len(df_releases)
+
+    return [run_benchmark("SnowflakeDatabase.load_data", load, repeat)]
+
+
+def bench_imports(rows: int, repeat: int) -> List[BenchmarkResult]:
+    """Import time of each entry point, measured in a fresh interpreter."""
+    results = []
+    for module in ENTRY_POINTS:
+        runs = []
+        for _ in range(repeat):
+            seconds, imported = measure_import_time(module, Path(__file__).parent)
+            runs.append(seconds)
+
+        heavy = [name for name in HEAVY_MODULES if name in imported]
+        logging.info(
+            f"Importing {module} loads: {', '.join(heavy) or 'no heavy modules'}"
+        )
+        results.append(
+            BenchmarkResult(f"import {module}", 0, min(runs), runs, per_row=False)
+        )
+
+    return results
+
+
+def bench_query(rows: int, repeat: int) -> List[BenchmarkResult]:
+    """
+    Local query engine over synthetic processed files: opening it (which
+    materializes the joins and rollups) and a cold and a cached rollup query.
+    """
+    from helpers.duckdb_helpers import LocalQueryEngine
+
+    _, market_regions = load_mappings(COUNTRY_REGION_MAPPINGS)
+    query = "SELECT * FROM GROSS_BY_REGION ORDER BY LIFETIME_GROSS DESC"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_processed_parquets(rows, market_regions, Path(tmp_dir))
+
+        def build() -> int:
+            engine = LocalQueryEngine(Path(tmp_dir), cache_file=":memory:")
+            engine.close_connection()
+            return rows
+
+        engine = LocalQueryEngine(Path(tmp_dir), cache_file=":memory:")
+
+        def cold_query() -> int:
+            engine._results.clear()
+            return len(engine.execute_query(query))
+
+        results = [
+            run_benchmark("LocalQueryEngine[materialize]", build, repeat),
+            run_benchmark("LocalQueryEngine.execute_query", cold_query, repeat),
+            run_benchmark(
+                "LocalQueryEngine.execute_query[cached]",
+                lambda: len(engine.execute_query(query)),
+                repeat,
+            ),
+        ]
+        engine.close_connection()
+
+    return results
+
+
+def check_throttling(
+    server: LocalFixtureServer,
+    scheduler: AdaptiveScheduler,
+    responses: List[requests.Response],
+    retry_after: float,
+    grace: float = 0.2,
+) -> List[str]:
+    """
+    Returns a message for every way the scheduler mishandled a throttling
+    server. Requests already on their way when a 429 was answered get grace
+    seconds to arrive before the Retry-After pause counts as broken.
+    """
+    problems = []
+    if not server.throttle_times:
+        problems.append("the server never throttled, nothing was checked")
+    if scheduler.lowest_limit >= scheduler.initial_concurrency:
+        problems.append(
+            f"concurrency never dropped below {scheduler.initial_concurrency}"
+        )
+
+    for throttled_at in server.throttle_times:
+        early = [
+            arrived_at - throttled_at
+            for arrived_at in server.request_times
+            if throttled_at + grace < arrived_at < throttled_at + retry_after
+        ]
+        if early:
+            problems.append(
+                f"a request arrived {early[0]:.2f}s after a 429 asking for "
+                f"a {retry_after:.0f}s pause"
+            )
+            break
+
+    statuses = sorted({response.status_code for response in responses})
+    if statuses != [200]:
+        problems.append(f"responses ended with status codes {statuses}")
+    return problems
+
+
+def bench_scheduler(rows: int, repeat: int) -> List[BenchmarkResult]:
+    """
+    Fetches pages from a stand-in server that slows down above 4 concurrent
+    requests, so the scheduler has to find the limit from latency alone. A
+    second server answers 429 above 2 concurrent requests; the scheduler
+    starts above that and must back off, honour Retry-After and still get
+    every page.
+    """
+    results = []
+    requests_count = max(50, rows // 10)
+    fixtures = {"/title/synthetic/": build_title_page(10).encode("utf-8")}
+
+    with LocalFixtureServer(
+        fixtures,
+        base_latency=0.02,
+        slowdown=0.02,
+        comfortable_concurrency=4,
+        throttle_concurrency=8,
+    ) as server:
+
+        def fetch_pages() -> int:
+            scheduler = AdaptiveScheduler(max_concurrency=16, min_delay=0.0)
+            urls = [server.url("/title/synthetic/")] * requests_count
+            responses = list(scheduler.map(scheduler.get, urls))
+            scheduler.close()
+            logging.info(
+                f"Scheduler finished at concurrency {int(scheduler.limit)}, "
+                f"server throttled {server.requests_throttled} requests so far"
+            )
+            return sum(response.status_code == 200 for response in responses)
+
+        results.append(run_benchmark("AdaptiveScheduler.get", fetch_pages, repeat))
+
+    retry_after = 1
+    with LocalFixtureServer(
+        fixtures,
+        base_latency=0.05,
+        throttle_concurrency=2,
+        retry_after=retry_after,
+    ) as server:
+        # Throttled requests must not use up their retries before getting a 200
+        scheduler = AdaptiveScheduler(
+            max_concurrency=4, initial_concurrency=4, min_delay=0.0, max_retries=10
+        )
+        urls = [server.url("/title/synthetic/")] * 40
+        start = time.perf_counter()
+        responses = list(scheduler.map(scheduler.get, urls))
+        seconds = time.perf_counter() - start
+        scheduler.close()
+
+        logging.info(
+            f"Throttled scenario: server throttled {server.requests_throttled} "
+            f"requests, concurrency went from {scheduler.initial_concurrency} down to "
+            f"{int(scheduler.lowest_limit)} and ended at {int(scheduler.limit)}"
+        )
+        problems = check_throttling(server, scheduler, responses, retry_after)
+        if problems:
+            raise RuntimeError(
+                "AdaptiveScheduler.get[throttled]: " + "; ".join(problems)
+            )
+
+        ok = sum(response.status_code == 200 for response in responses)
+        results.append(
+            BenchmarkResult("AdaptiveScheduler.get[throttled]", ok, seconds, [seconds])
+        )
+
+    return results
+
+
+BENCHMARKS: Dict[str, Callable[[int, int], List[BenchmarkResult]]] = {
+    "scraper": bench_scraper,
+    "cleaner": bench_cleaner,
+    "loader": bench_loader,
+    "imports": bench_imports,
+}
+
+# Not part of "all": slow, or needing optional dependencies
+EXTRA_BENCHMARKS: Dict[str, Callable[[int, int], List[BenchmarkResult]]] = {
+    "scheduler": bench_scheduler,
+    "query": bench_query,
+}
+
+
+def record_fixtures(imdb_ids: List[str]) -> bool:
+    """Returns False when any of the pages could not be recorded."""
+    pages = {
+        f"title_{imdb_id}.html": f"https://www.boxofficemojo.com/title/{imdb_id}/"
+        for imdb_id in imdb_ids
+    }
+    pages.update({name: url for name, (url, _) in RECORDED_LISTINGS.items()})
+
+    recorded = True
+    for file_name, url in pages.items():
+        try:
+            req = requests.get(url)
+            req.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error recording fixture from {url}: {e}")
+            print(f"Could not record {url}: {e}")
+            recorded = False
+            continue
+
+        (BENCHMARK_FIXTURES_DIR / file_name).write_text(req.text, encoding="utf-8")
+        logging.info(f"Recorded {url} into {file_name}")
+
+    return recorded
+
+
+def print_results(results: List[BenchmarkResult]) -> None:
+    for result in results:
+        if not result.per_row:
+            print(f"{result.name:<50} {'':>17} {result.seconds:>10.4f}s")
+            continue
+        print(
+            f"{result.name:<50} {result.rows:>12,} rows "
+            f"{result.seconds:>10.4f}s {result.rows_per_second:>16,.0f} rows/s"
+        )
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("Usage: script.py <option> [1k|100k|10m]")
+        sys.exit(1)
+
+    option = sys.argv[1]
+
+    # Set up logging
+    logging.basicConfig(
+        filename=f"benchmark_{option}.log",
+        filemode="w",
+        format="%(name)s - %(levelname)s - %(message)s",
+        level=logging.INFO,
+    )
+
+    logging.info("Script started with option: %s", option)
+
+    if option == "record":
+        if not record_fixtures(sys.argv[2:]):
+            sys.exit(1)
+        return
+
+    scale = sys.argv[2] if len(sys.argv) > 2 else "1k"
+    if scale not in SCALES:
+        print(f"Unknown scale: {scale}. Use one of {', '.join(SCALES)}")
+        sys.exit(1)
+
+    if option in ("all", "baseline"):
+        selected = list(BENCHMARKS)
+    elif option in BENCHMARKS or option in EXTRA_BENCHMARKS:
+        selected = [option]
+    else:
+        logging.error(f"Unknown option: {option}")
+        print(f"Unknown option: {option}")
+        sys.exit(1)
+
+    repeat = int(os.getenv("BENCHMARK_REPEAT", "3"))
+    tolerance = float(os.getenv("BENCHMARK_TOLERANCE", "0.25"))
+
+    results = []
+    try:
+        for name in selected:
+            benchmark = BENCHMARKS.get(name) or EXTRA_BENCHMARKS[name]
+            results.extend(benchmark(SCALES[scale], repeat))
+    except RuntimeError as e:
+        # Raised by benchmarks that also check behaviour, e.g. the scheduler
+        logging.error(f"Benchmark check failed: {e}")
+        print(f"FAILED {e}")
+        sys.exit(1)
+    finally:
+        dump_metrics(f"benchmark_{option}")
+
+    print_results(results)
+
+    if option == "baseline":
+        save_baselines(BENCHMARK_BASELINES_FILE, scale, results)
+        print(f"Baselines for scale {scale} saved to {BENCHMARK_BASELINES_FILE}")
+        return
+
+    baselines = load_baselines(BENCHMARK_BASELINES_FILE)
+    mismatches = find_host_mismatches(baselines, scale, results)
+    for mismatch in mismatches:
+        logging.warning(mismatch)
+        print(f"WARNING {mismatch}")
+
+    regressions = find_regressions(baselines, scale, results, tolerance)
+    for regression in regressions:
+        # Timings from other hardware can't gate a run, they are only reported
+        if mismatches:
+            logging.warning(regression)
+            print(f"WARNING {regression}")
+        else:
+            logging.error(regression)
+            print(f"REGRESSION {regression}")
+
+    if regressions and not mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,13 @@
 import sys
 import json
 import logging
-import numpy as np
 import pandas as pd
+from helpers.instrumentation_helpers import (
+    instrument,
+    add_rows,
+    mark_failed,
+    dump_metrics,
+)
 from helpers import (
     RAW_BOMOJO_MOVIES_AREAS_FILE,
     RAW_BOMOJO_MOVIES_REGIONS_FILE,
@@ -54,12 +59,13 @@ def classify_region(
 
 def convert_currency_to_int(df: pd.DataFrame, column_name: str) -> pd.DataFrame:
     df[column_name] = (
-        df[column_name].str.replace(r"[\$,]", "", regex=True).astype(np.int64)
+        df[column_name].str.replace(r"[\$,]", "", regex=True).astype("int64")
     )
 
     return df
 
 
+@instrument()
 def process_countries(country_mapping: dict, market_regions: dict) -> None:
     try:
         df_areas = pd.read_csv(
@@ -98,6 +104,7 @@ def process_countries(country_mapping: dict, market_regions: dict) -> None:
 
         logging.info("Data processing complete. Saving to file...")
 
+        add_rows(len(df_countries))
         df_countries.to_parquet(PRO_BOMOJO_COUNTRIES_FILE, index=False)
         logging.info(
             "Data successfully processed and saved to %s", PRO_BOMOJO_COUNTRIES_FILE
@@ -105,8 +112,10 @@ def process_countries(country_mapping: dict, market_regions: dict) -> None:
 
     except Exception as e:
         logging.error("An error occurred during data processing: %s", str(e))
+        mark_failed()
 
 
+@instrument()
 def process_releases(country_mapping: dict) -> None:
     try:
         df_releases = pd.read_csv(
@@ -126,6 +135,7 @@ def process_releases(country_mapping: dict) -> None:
 
         logging.info("Data processing complete. Saving to file...")
 
+        add_rows(len(df_releases))
         df_releases.to_parquet(PRO_BOMOJO_RELEASES_FILE, index=False)
         logging.info(
             "Data successfully processed and saved to %s", PRO_BOMOJO_RELEASES_FILE
@@ -133,8 +143,10 @@ def process_releases(country_mapping: dict) -> None:
 
     except Exception as e:
         logging.error("An error occurred during data processing: %s", str(e))
+        mark_failed()
 
 
+@instrument()
 def process_franchises() -> None:
     try:
         df_franchises = pd.read_csv(
@@ -143,6 +155,7 @@ def process_franchises() -> None:
 
         logging.info("Data processing complete. Saving to file...")
 
+        add_rows(len(df_franchises))
         df_franchises.to_parquet(PRO_BOMOJO_FRANCHISES_FILE, index=False)
         logging.info(
             "Data successfully processed and saved to %s", PRO_BOMOJO_FRANCHISES_FILE
@@ -150,8 +163,10 @@ def process_franchises() -> None:
 
     except Exception as e:
         logging.error("An error occurred during data processing: %s", str(e))
+        mark_failed()
 
 
+@instrument()
 def process_brands() -> None:
     try:
         df_brands = pd.read_csv(RAW_BOMOJO_BRANDS_FILE, encoding="utf-8").rename(
@@ -160,6 +175,7 @@ def process_brands() -> None:
 
         logging.info("Data processing complete. Saving to file...")
 
+        add_rows(len(df_brands))
         df_brands.to_parquet(PRO_BOMOJO_BRANDS_FILE, index=False)
         logging.info(
             "Data successfully processed and saved to %s", PRO_BOMOJO_BRANDS_FILE
@@ -167,6 +183,7 @@ def process_brands() -> None:
 
     except Exception as e:
         logging.error("An error occurred during data processing: %s", str(e))
+        mark_failed()
 
 
 def main():
@@ -203,6 +220,8 @@ def main():
     except Exception as e:
         logging.exception("An error occurred during the script execution.")
         sys.exit(1)
+    finally:
+        dump_metrics(f"cleaner_{option}")
 
 
 if __name__ == "__main__":
@@ -1,15 +1,28 @@
+from __future__ import annotations
+
 import os
 import sys
+import time
 import logging
 import requests
-import pandas as pd
 from pathlib import Path
-from bs4 import BeautifulSoup
+from collections import Counter
+from urllib.parse import urlsplit
 from dotenv import load_dotenv
-from typing import List, Optional
-from helpers.snowflake_helpers import SnowflakeDatabase
+from typing import TYPE_CHECKING, List, Optional
 from helpers.web_scraping_helpers import table_to_dataframe, get_href_table
+from helpers.instrumentation_helpers import instrument, dump_metrics
+from helpers.scheduling_helpers import AdaptiveScheduler
+from helpers.sharding_helpers import (
+    ShardQueue,
+    shard_of,
+    part_file,
+    merge_part_files,
+    remove_part_files,
+    shard_count_of,
+)
 from helpers import (
+    RAW_DATA_DIR,
     RAW_BOMOJO_MOVIES_AREAS_FILE,
     RAW_BOMOJO_MOVIES_REGIONS_FILE,
     RAW_BOMOJO_MOVIES_RELEASES_FILE,
@@ -17,13 +30,49 @@ from helpers import (
     RAW_BOMOJO_BRANDS_FILE,
 )
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from bs4 import BeautifulSoup
+
+# pandas, bs4 and the Snowflake connector are imported where they are used, so
+# options that don't need them (e.g. --merge, franchises) start faster
+
 load_dotenv()
 
+FRANCHISES_URL = "https://www.boxofficemojo.com/franchise/?ref_=bo_nb_gs_secondarytab"
+BRANDS_URL = "https://www.boxofficemojo.com/brand/?ref_=bo_nb_frs_secondarytab"
+
+# Files written by each option and the column hashed to assign work to a shard
+SHARDED_OUTPUTS = {
+    "countries": [
+        RAW_BOMOJO_MOVIES_RELEASES_FILE,
+        RAW_BOMOJO_MOVIES_REGIONS_FILE,
+        RAW_BOMOJO_MOVIES_AREAS_FILE,
+    ],
+    "franchises": [RAW_BOMOJO_FRANCHISES_FILE],
+    "brands": [RAW_BOMOJO_BRANDS_FILE],
+}
+SHARD_KEYS = {"countries": "IMDB_ID", "franchises": "href", "brands": "href"}
+# Longest wait between checks for shards leased by other workers
+SHARD_POLL_SECONDS = 30.0
 
+_scheduler: Optional[AdaptiveScheduler] = None
+
+
+def get_scheduler() -> AdaptiveScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AdaptiveScheduler.from_env()
+    return _scheduler
+
+
+@instrument()
 def fetch_movie_data(url: str) -> Optional[List[BeautifulSoup]]:
+    from bs4 import BeautifulSoup
+
     logging.info(f"Fetching data from {url}")
     try:
-        req = requests.get(url)
+        req = get_scheduler().get(url)
         req.raise_for_status()
 
     except (
@@ -39,71 +88,100 @@ def fetch_movie_data(url: str) -> Optional[List[BeautifulSoup]]:
     return tables
 
 
+def scrape_movie_imdb_id(movie_url: str, entity_name: str) -> Optional[dict]:
+    from bs4 import BeautifulSoup
+
+    logging.info("Scraping movie URL: %s", movie_url)
+
+    try:
+        req_movie = get_scheduler().get(movie_url)
+        req_movie.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        logging.error(
+            "Error occurred while scraping movie URL %s: %s",
+            movie_url,
+            str(e),
+        )
+        return None
+
+    soup_movie = BeautifulSoup(req_movie.text, "html.parser")
+    first_pro_imdb_link = soup_movie.find(
+        "a",
+        href=lambda href: href and "https://pro.imdb.com/title" in href,
+    )
+
+    if first_pro_imdb_link:
+        imdb_id = str(first_pro_imdb_link).split("/title/")[-1].split("/")[0]
+    else:
+        imdb_id = None
+
+    return {"Entity": entity_name, "IMDB_ID": imdb_id}
+
+
+def get_entity_movies(url: str, key_work: str) -> Optional[pd.DataFrame]:
+    from bs4 import BeautifulSoup
+
+    try:
+        req = get_scheduler().get(url)
+    except requests.exceptions.RequestException as e:
+        logging.error("Error occurred while processing URL %s: %s", url, str(e))
+        return None
+
+    soup = BeautifulSoup(req.text, "html.parser")
+    df_movies = get_href_table(soup, key_work)
+    df_movies["href"] = df_movies["href"].apply(
+        lambda href: f"https://www.boxofficemojo.com{href}"
+    )
+    return df_movies
+
+
 def scrape_imdb_ids(
     df_data: pd.DataFrame, url_column: str, entity_column: str, key_work: str
 ) -> pd.DataFrame:
     """
-    In the first loop, it retrieves all the links to movies associated with each entity.
-    In the second loop, it makes requests to each movie URL to extract the IMDb ID.
+    In the first pass, it retrieves all the links to movies associated with each entity.
+    In the second pass, it makes requests to each movie URL to extract the IMDb ID.
+    Each pass goes through a single scheduler map, so requests are not limited
+    to one entity at a time.
     """
-    imdb_data = []
-
-    for url, entity_name in zip(df_data[url_column], df_data[entity_column]):
-        logging.info("Processing: %s", entity_name)
-
-        total_movies = 0
-        total_movies_found = 0
-
-        try:
-            req = requests.get(url)
-            soup = BeautifulSoup(req.text, "html.parser")
-
-            df_movies = get_href_table(soup, key_work)
-            df_movies["href"] = df_movies["href"].apply(
-                lambda href: f"https://www.boxofficemojo.com{href}"
-            )
-            total_movies += len(df_movies)
-
-            for movie_url in df_movies["href"]:
-                logging.info("Scraping movie URL: %s", movie_url)
-
-                try:
-                    req_movie = requests.get(movie_url)
-                    req_movie.raise_for_status()
-
-                    soup_movie = BeautifulSoup(req_movie.text, "html.parser")
-                    first_pro_imdb_link = soup_movie.find(
-                        "a",
-                        href=lambda href: href and "https://pro.imdb.com/title" in href,
-                    )
-
-                    if first_pro_imdb_link:
-                        imdb_id = (
-                            str(first_pro_imdb_link).split("/title/")[-1].split("/")[0]
-                        )
-                        total_movies_found += 1
-                    else:
-                        imdb_id = None
-
-                    imdb_data.append({"Entity": entity_name, "IMDB_ID": imdb_id})
-
-                except requests.exceptions.RequestException as e:
-                    logging.error(
-                        "Error occurred while scraping movie URL %s: %s",
-                        movie_url,
-                        str(e),
-                    )
-                    continue
-
-            logging.info("Total movies found: %d/%d", total_movies_found, total_movies)
-
-        except requests.exceptions.RequestException as e:
-            logging.error("Error occurred while processing URL %s: %s", url, str(e))
-            continue
+    import pandas as pd
+
+    scheduler = get_scheduler()
+    entity_names = list(df_data[entity_column])
+
+    movies = []
+    for entity_name, df_movies in zip(
+        entity_names,
+        scheduler.map(
+            lambda url: get_entity_movies(url, key_work), df_data[url_column]
+        ),
+    ):
+        if df_movies is not None:
+            logging.info("Processing: %s", entity_name)
+            movies.extend((movie_url, entity_name) for movie_url in df_movies["href"])
+
+    imdb_data = [
+        row
+        for row in scheduler.map(lambda movie: scrape_movie_imdb_id(*movie), movies)
+        if row is not None
+    ]
+
+    total_movies = Counter(entity_name for _, entity_name in movies)
+    total_movies_found = Counter(
+        row["Entity"] for row in imdb_data if row["IMDB_ID"] is not None
+    )
+    for entity_name, total in total_movies.items():
+        logging.info(
+            "Total movies found for %s: %d/%d",
+            entity_name,
+            total_movies_found[entity_name],
+            total,
+        )
 
     return pd.DataFrame(imdb_data)
 
 
+@instrument()
 def append_to_csv(df: pd.DataFrame, csv_file: str) -> None:
     try:
         if not Path(csv_file).exists():
@@ -115,11 +193,23 @@ def append_to_csv(df: pd.DataFrame, csv_file: str) -> None:
         logging.error(f"Error writing to CSV file {csv_file}: {e}")
 
 
-def get_countries(df_imdb_id: pd.DataFrame) -> None:
+def get_countries(
+    df_imdb_id: pd.DataFrame,
+    releases_file: Path = RAW_BOMOJO_MOVIES_RELEASES_FILE,
+    regions_file: Path = RAW_BOMOJO_MOVIES_REGIONS_FILE,
+    areas_file: Path = RAW_BOMOJO_MOVIES_AREAS_FILE,
+) -> None:
     total_ids = len(df_imdb_id["IMDB_ID"])
-    for index, imdb_id in enumerate(df_imdb_id["IMDB_ID"], start=1):
-        url = f"https://www.boxofficemojo.com/title/{imdb_id}/"
-        tables = fetch_movie_data(url)
+    urls = [
+        f"https://www.boxofficemojo.com/title/{imdb_id}/"
+        for imdb_id in df_imdb_id["IMDB_ID"]
+    ]
+
+    # Pages are fetched concurrently, results are written in the original order
+    all_tables = get_scheduler().map(fetch_movie_data, urls)
+    for index, (imdb_id, tables) in enumerate(
+        zip(df_imdb_id["IMDB_ID"], all_tables), start=1
+    ):
         if not tables:
             continue
 
@@ -129,13 +219,13 @@ def get_countries(df_imdb_id: pd.DataFrame) -> None:
         ):
             df_movie_releases = table_to_dataframe(tables[0])
             df_movie_releases["IMDB_ID"] = imdb_id
-            append_to_csv(df_movie_releases, RAW_BOMOJO_MOVIES_RELEASES_FILE)
+            append_to_csv(df_movie_releases, releases_file)
 
             table_start_index = 1
-            csv_file_name = RAW_BOMOJO_MOVIES_REGIONS_FILE
+            csv_file_name = regions_file
         else:
             table_start_index = 0
-            csv_file_name = RAW_BOMOJO_MOVIES_AREAS_FILE
+            csv_file_name = areas_file
 
         if len(tables) > 1:
             for table in tables[table_start_index:]:
@@ -147,47 +237,200 @@ def get_countries(df_imdb_id: pd.DataFrame) -> None:
         logging.info(f"Processed IMDb ID {imdb_id}. Remaining IDs: {remaining_ids}")
 
 
-def get_franchises() -> None:
-    url = "https://www.boxofficemojo.com/franchise/?ref_=bo_nb_gs_secondarytab"
-    req = requests.get(url)
-    soup = BeautifulSoup(req.text, "html.parser")
+def get_imdb_ids() -> pd.DataFrame:
+    from helpers.snowflake_helpers import SnowflakeDatabase
 
-    df_franchises = get_href_table(soup, "franchise/fr")
-    df_franchises["href"] = df_franchises["href"].apply(
-        lambda href: f"https://www.boxofficemojo.com{href}"
+    db = SnowflakeDatabase(
+        os.getenv("USER"),
+        os.getenv("PASSWORD"),
+        os.getenv("ACCOUNT"),
+        os.getenv("WAREHOUSE"),
+        os.getenv("DATABASE"),
+        os.getenv("SCHEMA"),
     )
 
-    df_franchises_imdb_id = scrape_imdb_ids(df_franchises, "href", "Name", "release/rl")
+    try:
+        return db.execute_query(
+            """
+            SELECT 
+                OMDB.IMDB_ID,
+                OMDB.TITLE
+            FROM
+                MOVIE_CHALLENGE.PUBLIC.OMDB_MOVIES OMDB
+            WHERE 
+                OMDB.BOX_OFFICE IS NOT NULL
+            """
+        )
+    finally:
+        db.close_connection()
+        logging.info("Database connection closed.")
 
-    append_to_csv(df_franchises_imdb_id, RAW_BOMOJO_FRANCHISES_FILE)
 
+def get_entities(url: str, key_word: str) -> pd.DataFrame:
+    from bs4 import BeautifulSoup
 
-def get_brands() -> None:
-    url = "https://www.boxofficemojo.com/brand/?ref_=bo_nb_frs_secondarytab"
-    req = requests.get(url)
+    req = get_scheduler().get(url)
     soup = BeautifulSoup(req.text, "html.parser")
 
-    df_brands = get_href_table(soup, "brand/bn")
-    df_brands["href"] = df_brands["href"].apply(
+    df_entities = get_href_table(soup, key_word)
+    df_entities["href"] = df_entities["href"].apply(
         lambda href: f"https://www.boxofficemojo.com{href}"
     )
-    df_brands
+    return df_entities
+
+
+def get_franchises(
+    df_franchises: Optional[pd.DataFrame] = None,
+    csv_file: Path = RAW_BOMOJO_FRANCHISES_FILE,
+) -> None:
+    if df_franchises is None:
+        df_franchises = get_entities(FRANCHISES_URL, "franchise/fr")
+
+    df_franchises_imdb_id = scrape_imdb_ids(df_franchises, "href", "Name", "release/rl")
+
+    append_to_csv(df_franchises_imdb_id, csv_file)
+
+
+def get_brands(
+    df_brands: Optional[pd.DataFrame] = None,
+    csv_file: Path = RAW_BOMOJO_BRANDS_FILE,
+) -> None:
+    if df_brands is None:
+        df_brands = get_entities(BRANDS_URL, "brand/bn")
 
     df_brands_imdb_id = scrape_imdb_ids(df_brands, "href", "Name", "release/rl")
 
-    append_to_csv(df_brands_imdb_id, RAW_BOMOJO_BRANDS_FILE)
+    append_to_csv(df_brands_imdb_id, csv_file)
+
+
+def get_queue_file(option: str) -> Path:
+    return RAW_DATA_DIR / f"scraper_{option}_shards.sqlite"
+
+
+def get_work_list(option: str) -> pd.DataFrame:
+    if option == "countries":
+        return get_imdb_ids()
+    elif option == "franchises":
+        return get_entities(FRANCHISES_URL, "franchise/fr")
+    return get_entities(BRANDS_URL, "brand/bn")
+
+
+def shard_key(value: str) -> str:
+    # Listing hrefs carry a rank-dependent ?ref_= query, only the path is stable
+    return urlsplit(str(value)).path
+
+
+def scrape_shard(
+    option: str, df_work: pd.DataFrame, shard: int, shard_count: int, owner: str
+) -> None:
+    key_column = SHARD_KEYS[option]
+    df_shard = df_work[
+        df_work[key_column].map(lambda key: shard_of(shard_key(key), shard_count))
+        == shard
+    ]
+    output_files = [
+        part_file(csv_file, shard, shard_count, owner)
+        for csv_file in SHARDED_OUTPUTS[option]
+    ]
+    logging.info(f"Scraping {len(df_shard)} items of shard {shard}/{shard_count}")
+
+    if option == "countries":
+        get_countries(df_shard, *output_files)
+    elif option == "franchises":
+        get_franchises(df_shard, *output_files)
+    else:
+        get_brands(df_shard, *output_files)
+
+
+def run_shard_worker(option: str, shard_count: int) -> None:
+    """
+    Claims shards from the queue until all of them are done. While other
+    workers hold the remaining shards it waits for their leases, so the shard
+    of a dead worker is reclaimed. Each shard writes part files named after
+    the worker; --merge only combines those of the worker that completed the
+    shard, so a worker that lost its lease can't mix rows into them.
+    """
+    queue = ShardQueue(
+        get_queue_file(option),
+        shard_count,
+        lease_seconds=float(os.getenv("SHARD_LEASE_SECONDS", "600")),
+    )
+    df_work = get_work_list(option)
+
+    while True:
+        shard = queue.claim()
+        if shard is None:
+            pending = queue.pending()
+            if not pending:
+                break
+
+            expires = queue.next_lease_expiry()
+            wait = SHARD_POLL_SECONDS if expires is None else expires - time.time()
+            wait = min(max(wait, 0.0) + 1.0, SHARD_POLL_SECONDS)
+            logging.info(f"Shards {pending} are leased, checking again in {wait:.0f}s")
+            time.sleep(wait)
+            continue
+
+        # Drop any partial output this worker left in an earlier attempt
+        remove_part_files(SHARDED_OUTPUTS[option], shard, shard_count, queue.worker_id)
+        with queue.leased(shard):
+            scrape_shard(option, df_work, shard, shard_count, queue.worker_id)
+        queue.complete(shard)
+
+    logging.info(f"All shards of {option} are done")
+
+
+def merge_shards(option: str) -> None:
+    queue_file = get_queue_file(option)
+    shard_count = shard_count_of(queue_file)
+    if shard_count is None:
+        raise FileNotFoundError(f"No shard queue found at {queue_file}")
+
+    queue = ShardQueue(queue_file, shard_count)
+    pending = queue.pending()
+    if pending:
+        raise RuntimeError(f"Shards not completed yet: {pending}")
+
+    owners = queue.owners()
+    for csv_file in SHARDED_OUTPUTS[option]:
+        merge_part_files(csv_file, shard_count, owners)
+    queue_file.unlink()
+
+
+def parse_shard_count(flags: List[str]) -> Optional[int]:
+    if "--shards" not in flags:
+        return None
+
+    value = flags[flags.index("--shards") + 1 :][:1]
+    if not value or not value[0].isdigit() or int(value[0]) < 1:
+        raise ValueError("--shards needs a whole number of shards of at least 1")
+    return int(value[0])
 
 
 def main():
+    usage = "Usage: script.py <option> [--shards N | --merge]"
     if len(sys.argv) < 2:
-        print("Usage: script.py <option>")
+        print(usage)
         sys.exit(1)
 
     option = sys.argv[1]
+    flags = sys.argv[2:]
+    try:
+        shard_count = parse_shard_count(flags)
+    except ValueError as e:
+        print(f"{e}\n{usage}")
+        sys.exit(1)
+
+    # Sharded workers run concurrently, each gets its own log and metrics file
+    run_name = (
+        f"scraper_{option}_{os.getpid()}"
+        if shard_count is not None
+        else f"scraper_{option}"
+    )
 
     # Set up logging
     logging.basicConfig(
-        filename=f"scraper_{option}.log",
+        filename=f"{run_name}.log",
         filemode="w",
         format="%(name)s - %(levelname)s - %(message)s",
         level=logging.INFO,
@@ -196,47 +439,26 @@ def main():
     logging.info("Script started with option: %s", option)
 
     try:
-        if option == "countries":
-            try:
-                db = SnowflakeDatabase(
-                    os.getenv("USER"),
-                    os.getenv("PASSWORD"),
-                    os.getenv("ACCOUNT"),
-                    os.getenv("WAREHOUSE"),
-                    os.getenv("DATABASE"),
-                    os.getenv("SCHEMA"),
-                )
-
-                df_imdb_id = db.execute_query(
-                    """
-                    SELECT 
-                        OMDB.IMDB_ID,
-                        OMDB.TITLE
-                    FROM
-                        MOVIE_CHALLENGE.PUBLIC.OMDB_MOVIES OMDB
-                    WHERE 
-                        OMDB.BOX_OFFICE IS NOT NULL
-                    """
-                )
-
-                get_countries(df_imdb_id)
-
-            except Exception as e:
-                logging.error(f"An error occurred: {e}")
-            finally:
-                db.close_connection()
-                logging.info("Database connection closed. The script has ended.")
-
+        if option not in SHARDED_OUTPUTS:
+            logging.error(f"Unknown option: {option}")
+        elif "--merge" in flags:
+            merge_shards(option)
+        elif shard_count is not None:
+            run_shard_worker(option, shard_count)
+        elif option == "countries":
+            get_countries(get_imdb_ids())
         elif option == "franchises":
             get_franchises()
         elif option == "brands":
             get_brands()
-        else:
-            logging.error(f"Unknown option: {option}")
 
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+        # Workers and merges are started by schedulers that need to see failures
+        if shard_count is not None or "--merge" in flags:
+            sys.exit(1)
     finally:
+        dump_metrics(run_name)
         logging.info("The process has been completed.")
 
 
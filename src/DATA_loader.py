@@ -1,11 +1,14 @@
 import os
 import sys
+import time
 import logging
 import pandas as pd
-from typing import List
+from typing import Dict, List, Tuple
 from pathlib import Path
 from dotenv import load_dotenv
-from helpers.snowflake_helpers import SnowflakeDatabase
+from concurrent.futures import ThreadPoolExecutor
+from helpers.snowflake_helpers import SnowflakeDatabase, SnowflakeConnectionPool
+from helpers.instrumentation_helpers import dump_metrics
 from helpers import (
     PRO_BOMOJO_RELEASES_FILE,
     PRO_BOMOJO_COUNTRIES_FILE,
@@ -17,105 +20,163 @@ from helpers import (
 
 load_dotenv()
 
+# Processed file, column order and target table of each option
+LOAD_CONFIGS: Dict[str, Tuple[Path, List[str], str]] = {
+    "releases": (
+        PRO_BOMOJO_RELEASES_FILE,
+        [
+            "IMDB_ID",
+            "RELEASE_GROUP",
+            "ROLLOUT",
+            "MARKETS",
+            "DOMESTIC",
+            "INTERNATIONAL",
+            "WORLDWIDE",
+        ],
+        "BOMOJO_RELEASES",
+    ),
+    "countries": (
+        PRO_BOMOJO_COUNTRIES_FILE,
+        [
+            "IMDB_ID",
+            "AREA",
+            "REGION",
+            "RELEASES",
+            "LIFETIME_GROSS",
+        ],
+        "BOMOJO_COUNTRIES",
+    ),
+    "brands": (
+        PRO_BOMOJO_BRANDS_FILE,
+        [
+            "BRAND",
+            "IMDB_ID",
+        ],
+        "BOMOJO_BRANDS",
+    ),
+    "franchises": (
+        PRO_BOMOJO_FRANCHISES_FILE,
+        [
+            "FRANCHISE",
+            "IMDB_ID",
+        ],
+        "BOMOJO_FRANCHISES",
+    ),
+    "awards": (
+        PRO_MOVIES_AWARDS_FILE,
+        [
+            "YEAR_FILM",
+            "YEAR_CEREMONY",
+            "CATEGORY",
+            "NOMINEE",
+            "MOVIE",
+            "WINNER",
+            "AWARD",
+        ],
+        "MOVIE_AWARDS",
+    ),
+}
+
+
+def read_data(file_path: Path, desired_order: List) -> pd.DataFrame:
+    df = pd.read_parquet(file_path)
+    return df.reindex(columns=desired_order)
+
+
+def connect() -> SnowflakeDatabase:
+    return SnowflakeDatabase(
+        os.getenv("USER"),
+        os.getenv("PASSWORD"),
+        os.getenv("ACCOUNT"),
+        os.getenv("WAREHOUSE"),
+        os.getenv("PERSONAL_DATABASE"),
+        os.getenv("PERSONAL_SCHEMA"),
+    )
 
-def load_data(
-    db: SnowflakeDatabase, file_path: Path, desired_order: List, table_name: str
-) -> None:
-    try:
-        df = pd.read_parquet(file_path)
-    except Exception as e:
-        logging.error(f"Error reading parquet file: {e}")
-        return
 
-    df = df.reindex(columns=desired_order)
+def load_option(pool: SnowflakeConnectionPool, option: str) -> Dict:
+    file_path, desired_order, table_name = LOAD_CONFIGS[option]
+    start = time.perf_counter()
+    result = {"option": option, "table": table_name, "rows": 0, "error": None}
 
     try:
-        db.load_data(df, table_name)
+        # The file is read before taking a connection, so a missing file doesn't
+        # open one and a slow read doesn't hold a pool slot
+        df = read_data(file_path, desired_order)
+        with pool.connection() as db:
+            db.load_data(df, table_name)
         logging.info(f"Data successfully loaded into {table_name}")
+        result["rows"] = len(df)
     except Exception as e:
-        print(f"Error loading data into the database: {e}")
+        logging.error(f"Error loading {option} into {table_name}: {e}")
+        result["error"] = str(e)
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def load_options(options: List[str], max_connections: int) -> List[Dict]:
+    """Loads the options concurrently over at most max_connections connections."""
+    pool_size = min(len(options), max_connections)
+    pool = SnowflakeConnectionPool(connect, pool_size)
+
+    try:
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            return list(executor.map(lambda option: load_option(pool, option), options))
+    finally:
+        pool.close_all()
+
+
+def report(results: List[Dict]) -> None:
+    for result in results:
+        status = f"FAILED: {result['error']}" if result["error"] else "OK"
+        line = (
+            f"{result['table']:<20} {result['rows']:>12,} rows "
+            f"{result['seconds']:>10.2f}s  {status}"
+        )
+        logging.info(line)
+        print(line)
 
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: script.py <option>")
+        print("Usage: script.py <option> [<option> ...] | all")
         sys.exit(1)
 
-    option = sys.argv[1]
+    # Repeated options would load the same table twice, concurrently
+    options = list(
+        dict.fromkeys(LOAD_CONFIGS if sys.argv[1:] == ["all"] else sys.argv[1:])
+    )
+    run_name = "_".join(dict.fromkeys(sys.argv[1:]))
 
     # Set up logging
     logging.basicConfig(
-        filename=f"loader_{option}.log",
+        filename=f"loader_{run_name}.log",
         filemode="w",
         format="%(name)s - %(levelname)s - %(message)s",
         level=logging.INFO,
     )
 
-    logging.info("Script started with option: %s", option)
-
-    try:
-        db = SnowflakeDatabase(
-            os.getenv("USER"),
-            os.getenv("PASSWORD"),
-            os.getenv("ACCOUNT"),
-            os.getenv("WAREHOUSE"),
-            os.getenv("PERSONAL_DATABASE"),
-            os.getenv("PERSONAL_SCHEMA"),
-        )
+    logging.info("Script started with options: %s", ", ".join(options))
 
-        if option == "releases":
-            desired_order = [
-                "IMDB_ID",
-                "RELEASE_GROUP",
-                "ROLLOUT",
-                "MARKETS",
-                "DOMESTIC",
-                "INTERNATIONAL",
-                "WORLDWIDE",
-            ]
-            load_data(db, PRO_BOMOJO_RELEASES_FILE, desired_order, "BOMOJO_RELEASES")
-        elif option == "countries":
-            desired_order = [
-                "IMDB_ID",
-                "AREA",
-                "REGION",
-                "RELEASES",
-                "LIFETIME_GROSS",
-            ]
-            load_data(db, PRO_BOMOJO_COUNTRIES_FILE, desired_order, "BOMOJO_COUNTRIES")
-        elif option == "brands":
-            desired_order = [
-                "BRAND",
-                "IMDB_ID",
-            ]
-            load_data(db, PRO_BOMOJO_BRANDS_FILE, desired_order, "BOMOJO_BRANDS")
-        elif option == "franchises":
-            desired_order = [
-                "FRANCHISE",
-                "IMDB_ID",
-            ]
-            load_data(
-                db, PRO_BOMOJO_FRANCHISES_FILE, desired_order, "BOMOJO_FRANCHISES"
-            )
-        elif option == "awards":
-            desired_order = [
-                "YEAR_FILM",
-                "YEAR_CEREMONY",
-                "CATEGORY",
-                "NOMINEE",
-                "MOVIE",
-                "WINNER",
-                "AWARD",
-            ]
-            load_data(db, PRO_MOVIES_AWARDS_FILE, desired_order, "MOVIE_AWARDS")
-        else:
-            logging.error(f"Unknown option: {option}")
+    unknown = [option for option in options if option not in LOAD_CONFIGS]
+    if unknown:
+        logging.error(f"Unknown option: {', '.join(unknown)}")
+        print(f"Unknown option: {', '.join(unknown)}")
+        sys.exit(1)
 
+    try:
+        results = load_options(options, int(os.getenv("LOADER_MAX_CONNECTIONS", "3")))
+        report(results)
     except Exception as e:
         logging.error(f"An error occurred: {e}")
+        sys.exit(1)
     finally:
-        db.close_connection()
-        logging.info("Database connection closed. The script has ended.")
+        dump_metrics(f"loader_{run_name}")
+        logging.info("Database connections closed. The script has ended.")
+
+    if any(result["error"] for result in results):
+        sys.exit(1)
 
 
 if __name__ == "__main__":
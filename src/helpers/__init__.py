@@ -1,6 +1,8 @@
 from pathlib import Path
+from functools import lru_cache
 
 
+@lru_cache(maxsize=None)
 def get_data_dir(data_type: str) -> Path:
     # Define the relative path from the script
     relative_path = Path("data") / data_type
@@ -17,24 +19,43 @@ def get_data_dir(data_type: str) -> Path:
 
 
 # Data directories
-RAW_DATA_DIR = get_data_dir("raw")
-PROCESSED_DATA_DIR = get_data_dir("processed")
-MAPPING_DATA_DIR = get_data_dir("mappings")
+DATA_DIRS = {
+    "RAW_DATA_DIR": "raw",
+    "PROCESSED_DATA_DIR": "processed",
+    "MAPPING_DATA_DIR": "mappings",
+    "BENCHMARK_DATA_DIR": "benchmarks",
+}
 
 
 # Paths to specific files
-RAW_BOMOJO_MOVIES_RELEASES_FILE = RAW_DATA_DIR / "BOMOJO_MOVIES_RELEASES.csv"
-RAW_BOMOJO_MOVIES_REGIONS_FILE = RAW_DATA_DIR / "BOMOJO_MOVIES_REGIONS.csv"
-RAW_BOMOJO_MOVIES_AREAS_FILE = RAW_DATA_DIR / "BOMOJO_MOVIES_AREAS.csv"
-RAW_BOMOJO_FRANCHISES_FILE = RAW_DATA_DIR / "BOMOJO_FRANCHISES.csv"
-RAW_BOMOJO_BRANDS_FILE = RAW_DATA_DIR / "BOMOJO_BRANDS.csv"
-RAW_OSCARS_FILE = RAW_DATA_DIR / "the_oscar_award.csv"
-RAW_RAZZIES_FILE = RAW_DATA_DIR / "razzies.csv"
-
-PRO_BOMOJO_COUNTRIES_FILE = PROCESSED_DATA_DIR / "BOMOJO_MOVIES_COUNTRIES.parquet"
-PRO_BOMOJO_RELEASES_FILE = PROCESSED_DATA_DIR / "BOMOJO_MOVIES_RELEASES.parquet"
-PRO_BOMOJO_FRANCHISES_FILE = PROCESSED_DATA_DIR / "BOMOJO_FRANCHISES.parquet"
-PRO_BOMOJO_BRANDS_FILE = PROCESSED_DATA_DIR / "BOMOJO_BRANDS.parquet"
-PRO_MOVIES_AWARDS_FILE = PROCESSED_DATA_DIR / "MOVIES_AWARDS.parquet"
-
-COUNTRY_REGION_MAPPINGS = MAPPING_DATA_DIR / "country_and_region_mappings.json"
+DATA_FILES = {
+    "RAW_BOMOJO_MOVIES_RELEASES_FILE": ("raw", "BOMOJO_MOVIES_RELEASES.csv"),
+    "RAW_BOMOJO_MOVIES_REGIONS_FILE": ("raw", "BOMOJO_MOVIES_REGIONS.csv"),
+    "RAW_BOMOJO_MOVIES_AREAS_FILE": ("raw", "BOMOJO_MOVIES_AREAS.csv"),
+    "RAW_BOMOJO_FRANCHISES_FILE": ("raw", "BOMOJO_FRANCHISES.csv"),
+    "RAW_BOMOJO_BRANDS_FILE": ("raw", "BOMOJO_BRANDS.csv"),
+    "RAW_OSCARS_FILE": ("raw", "the_oscar_award.csv"),
+    "RAW_RAZZIES_FILE": ("raw", "razzies.csv"),
+    "PRO_BOMOJO_COUNTRIES_FILE": ("processed", "BOMOJO_MOVIES_COUNTRIES.parquet"),
+    "PRO_BOMOJO_RELEASES_FILE": ("processed", "BOMOJO_MOVIES_RELEASES.parquet"),
+    "PRO_BOMOJO_FRANCHISES_FILE": ("processed", "BOMOJO_FRANCHISES.parquet"),
+    "PRO_BOMOJO_BRANDS_FILE": ("processed", "BOMOJO_BRANDS.parquet"),
+    "PRO_MOVIES_AWARDS_FILE": ("processed", "MOVIES_AWARDS.parquet"),
+    "COUNTRY_REGION_MAPPINGS": ("mappings", "country_and_region_mappings.json"),
+    "BENCHMARK_FIXTURES_DIR": ("benchmarks", "fixtures"),
+    "BENCHMARK_BASELINES_FILE": ("benchmarks", "baselines.json"),
+}
+
+
+def __getattr__(name: str) -> Path:
+    # Directories are only looked up (once) when a script imports a path that needs them
+    if name in DATA_DIRS:
+        return get_data_dir(DATA_DIRS[name])
+    if name in DATA_FILES:
+        data_type, file_name = DATA_FILES[name]
+        return get_data_dir(data_type) / file_name
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + list(DATA_DIRS) + list(DATA_FILES))
@@ -0,0 +1,465 @@
+import os
+import sys
+import json
+import platform
+import time
+import logging
+import threading
+import subprocess
+import numpy as np
+import pandas as pd
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from helpers.snowflake_helpers import SnowflakeDatabase
+
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+# Baselines section for benchmarks that don't depend on the scale, e.g. imports
+UNSCALED = "unscaled"
+
+# Synthetic pages are generated with a fixed size and reused until the scale is reached
+ROWS_PER_PAGE = 1_000
+
+
+def build_title_page(rows: int, seed: int = 0) -> str:
+    """Synthetic Box Office Mojo title page with a single area table."""
+    rng = np.random.default_rng(seed)
+    grosses = rng.integers(1_000, 500_000_000, size=rows)
+
+    # No whitespace between tags: table_to_dataframe iterates over the table children
+    cells = [
+        "<tr><th>Area</th><th>Release Date</th><th>Opening</th><th>Gross</th></tr>"
+    ]
+    for index, gross in enumerate(grosses):
+        cells.append(
+            f"<tr><td>Area {index % 120}</td><td>Jan 1, 2020</td>"
+            f"<td>${gross // 10:,}</td><td>${gross:,}</td></tr>"
+        )
+    return f"<html><body><h3>By Area</h3><table>{''.join(cells)}</table></body></html>"
+
+
+def build_listing_page(rows: int, key_word: str) -> str:
+    """Synthetic franchise/brand listing where every other link matches key_word."""
+    links = []
+    for index in range(rows):
+        href = f"/{key_word}{index:07d}/" if index % 2 == 0 else f"/other/{index}/"
+        links.append(f'<a class="a-link-normal" href="{href}">Entity {index}</a>')
+    return f"<html><body>{''.join(links)}</body></html>"
+
+
+def build_countries_frame(
+    rows: int, market_regions: dict, seed: int = 0
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    areas = [country for countries in market_regions.values() for country in countries]
+    # Include names that go through the mapping and the suffix rules
+    areas += ["Russia/CIS", "Bosnia", "Türkiye", "Curaçao", "Unknown Market"]
+    return pd.DataFrame(
+        {
+            "IMDB_ID": [f"tt{i:07d}" for i in rng.integers(0, 9_999_999, size=rows)],
+            "AREA": rng.choice(areas, size=rows),
+        }
+    )
+
+
+def build_currency_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    grosses = pd.Series(rng.integers(0, 3_000_000_000, size=rows))
+    return pd.DataFrame({"WORLDWIDE": "$" + grosses.map("{:,}".format)})
+
+
+def build_releases_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(
+        {
+            "IMDB_ID": [f"tt{i:07d}" for i in rng.integers(0, 9_999_999, size=rows)],
+            "RELEASE_GROUP": "Original Release",
+            "ROLLOUT": "Jan 1, 2020",
+            "MARKETS": rng.integers(1, 80, size=rows),
+            "DOMESTIC": rng.integers(0, 900_000_000, size=rows),
+            "INTERNATIONAL": rng.integers(0, 2_000_000_000, size=rows),
+            "WORLDWIDE": rng.integers(0, 3_000_000_000, size=rows),
+        }
+    )
+
+
+def write_raw_country_csvs(
+    rows: int, market_regions: dict, areas_file: Path, regions_file: Path
+) -> None:
+    """Writes raw area and region CSVs shaped like the countries scraper output."""
+    df = build_countries_frame(rows, market_regions)
+    df["GROSS"] = build_currency_frame(rows)["WORLDWIDE"]
+
+    half = rows // 2
+    df.iloc[:half].rename(columns={"AREA": "Area", "GROSS": "Gross"}).assign(
+        **{"Release Date": "Jan 1, 2020", "Opening": "$1,000"}
+    )[["Area", "Release Date", "Opening", "Gross", "IMDB_ID"]].to_csv(
+        areas_file, encoding="utf-8", index=False
+    )
+    df.iloc[half:].rename(columns={"AREA": "APAC", "GROSS": "Lifetime Gross"}).assign(
+        **{"# Releases": 1}
+    )[["APAC", "# Releases", "Lifetime Gross", "IMDB_ID"]].to_csv(
+        regions_file, encoding="utf-8", index=False
+    )
+
+
+def write_processed_parquets(
+    rows: int, market_regions: dict, processed_dir: Path
+) -> None:
+    """
+    Writes processed countries, releases, franchises and brands files. Like
+    the scraper output, only some movies (the re-released ones) have releases.
+    """
+    rng = np.random.default_rng(0)
+    df_releases = build_releases_frame(max(1, rows // 10))
+    imdb_ids = df_releases["IMDB_ID"].to_numpy()
+    re_released = rng.random(len(imdb_ids)) < 0.3
+    df_releases = df_releases[re_released]
+
+    df_countries = build_countries_frame(rows, market_regions)
+    df_countries["IMDB_ID"] = rng.choice(imdb_ids, size=rows)
+    region_lookup = {
+        country: region
+        for region, countries in market_regions.items()
+        for country in countries
+    }
+    df_countries["REGION"] = df_countries["AREA"].map(region_lookup).fillna("OTHER")
+    df_countries["RELEASES"] = 1
+    df_countries["LIFETIME_GROSS"] = rng.integers(0, 500_000_000, size=rows)
+
+    df_releases.to_parquet(
+        processed_dir / "BOMOJO_MOVIES_RELEASES.parquet", index=False
+    )
+    df_countries.to_parquet(
+        processed_dir / "BOMOJO_MOVIES_COUNTRIES.parquet", index=False
+    )
+    for column, file_name in (
+        ("FRANCHISE", "BOMOJO_FRANCHISES.parquet"),
+        ("BRAND", "BOMOJO_BRANDS.parquet"),
+    ):
+        entity_ids = rng.integers(0, 500, size=len(imdb_ids))
+        pd.DataFrame(
+            {
+                column: [f"{column.title()} {i}" for i in entity_ids],
+                "IMDB_ID": imdb_ids,
+            }
+        ).to_parquet(processed_dir / file_name, index=False)
+
+
+def measure_import_time(module: str, cwd: Path) -> Tuple[float, List[str]]:
+    """
+    Imports module in a fresh interpreter with -X importtime. Returns its
+    cumulative import time in seconds and the names of all imported modules.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=cwd,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    # Lines look like "import time:   self [us] | cumulative | imported package"
+    timings = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            timings[parts[2].strip()] = int(parts[1])
+
+    return timings[module] / 1_000_000, list(timings)
+
+
+class FakeCursor:
+    """Cursor stand-in that binds parameters client-side like the connector does."""
+
+    def __init__(self):
+        self.rows_written = 0
+        self.bytes_bound = 0
+        self.description = []
+
+    def execute(self, query: str, params: Optional[tuple] = None) -> None:
+        pass
+
+    def executemany(self, query: str, seq_of_params: List) -> None:
+        for params in seq_of_params:
+            self.bytes_bound += len(query % tuple(repr(value) for value in params))
+            self.rows_written += 1
+
+    def fetchall(self) -> List:
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+class FakeConnection:
+    def cursor(self) -> FakeCursor:
+        return FakeCursor()
+
+    def close(self) -> None:
+        pass
+
+
+class FakeSnowflakeDatabase(SnowflakeDatabase):
+    def _connect(self):
+        return FakeConnection()
+
+
+class LocalFixtureServer:
+    """
+    Serves in-memory pages on localhost so the scraper fetch paths can be
+    benchmarked without hitting boxofficemojo.com. It can also stand in for a
+    server under load: every concurrent request above comfortable_concurrency
+    adds slowdown seconds of latency, and requests above throttle_concurrency
+    are answered with 429 and a Retry-After header. Arrival times of every
+    request and of every 429 answer are kept for checks.
+    """
+
+    def __init__(
+        self,
+        pages: Dict[str, bytes],
+        base_latency: float = 0.0,
+        slowdown: float = 0.0,
+        comfortable_concurrency: Optional[int] = None,
+        throttle_concurrency: Optional[int] = None,
+        retry_after: int = 1,
+    ):
+        self.pages = pages
+        self.base_latency = base_latency
+        self.slowdown = slowdown
+        self.comfortable_concurrency = comfortable_concurrency
+        self.throttle_concurrency = throttle_concurrency
+        self.retry_after = retry_after
+        self.requests_served = 0
+        self.requests_throttled = 0
+        self.request_times: List[float] = []
+        self.throttle_times: List[float] = []
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler_class(self):
+        fixture_server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                fixture_server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def handle(self, request: BaseHTTPRequestHandler) -> None:
+        with self._lock:
+            self.requests_served += 1
+            self.request_times.append(time.monotonic())
+            self.in_flight += 1
+            in_flight = self.in_flight
+
+        try:
+            self._respond(request, in_flight)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+    def _respond(self, request: BaseHTTPRequestHandler, in_flight: int) -> None:
+        if self.throttle_concurrency and in_flight > self.throttle_concurrency:
+            with self._lock:
+                self.requests_throttled += 1
+                self.throttle_times.append(time.monotonic())
+            request.send_response(429)
+            request.send_header("Retry-After", str(self.retry_after))
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        latency = self.base_latency
+        if self.comfortable_concurrency and in_flight > self.comfortable_concurrency:
+            latency += self.slowdown * (in_flight - self.comfortable_concurrency)
+        if latency:
+            time.sleep(latency)
+
+        body = self.pages.get(request.path)
+        if body is None:
+            request.send_response(404)
+            request.send_header("Content-Length", "0")
+            request.end_headers()
+            return
+
+        request.send_response(200)
+        request.send_header("Content-Type", "text/html; charset=utf-8")
+        request.send_header("Content-Length", str(len(body)))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}{path}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rows: int
+    seconds: float
+    runs: List[float] = field(default_factory=list)
+    # Results that aren't per row (e.g. import time) are compared in seconds
+    per_row: bool = True
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        if not self.per_row:
+            return {"seconds": self.seconds}
+        return {
+            "rows": self.rows,
+            "seconds": self.seconds,
+            "rows_per_second": self.rows_per_second,
+        }
+
+
+def run_benchmark(
+    name: str, func: Callable[[], int], repeat: int = 3, min_run_seconds: float = 0.2
+) -> BenchmarkResult:
+    """
+    Runs func `repeat` times and keeps the fastest run. func returns the
+    number of rows it processed. Calls faster than min_run_seconds are looped
+    within a run and averaged, so small scales aren't dominated by noise.
+    """
+    runs = []
+    rows = 0
+    for _ in range(repeat):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            rows = func()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_run_seconds:
+                break
+        runs.append(elapsed / calls)
+
+    result = BenchmarkResult(name, rows, min(runs), runs)
+    logging.info(
+        f"Benchmark {name}: {rows} rows in {result.seconds:.4f}s "
+        f"({result.rows_per_second:,.0f} rows/s)"
+    )
+    return result
+
+
+def host_info() -> Dict:
+    """Hardware and Python the benchmarks ran on, stored with the baselines."""
+    cpu_model = platform.processor()
+    cpuinfo = Path("/proc/cpuinfo")
+    if cpuinfo.exists():
+        for line in cpuinfo.read_text().splitlines():
+            if line.startswith("model name"):
+                cpu_model = line.split(":", 1)[1].strip()
+                break
+
+    return {
+        "system": platform.system(),
+        "machine": platform.machine(),
+        "cpu_model": cpu_model,
+        "cpu_count": os.cpu_count(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+    }
+
+
+def load_baselines(baselines_file: Path) -> Dict:
+    if not Path(baselines_file).exists():
+        return {}
+    with open(baselines_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baselines(
+    baselines_file: Path, scale: str, results: List[BenchmarkResult]
+) -> None:
+    """
+    Stores the results under their scale, or under UNSCALED for results that
+    aren't per row. Each section keeps the host it was recorded on.
+    """
+    baselines = load_baselines(baselines_file)
+    for result in results:
+        section = baselines.setdefault(
+            scale if result.per_row else UNSCALED, {"host": {}, "benchmarks": {}}
+        )
+        section["host"] = host_info()
+        section["benchmarks"][result.name] = result.to_dict()
+
+    with open(baselines_file, "w", encoding="utf-8") as f:
+        json.dump(baselines, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_host_mismatches(
+    baselines: Dict, scale: str, results: List[BenchmarkResult]
+) -> List[str]:
+    """
+    Returns a message for every baseline section used by results that was
+    recorded on different hardware or another Python than the current one.
+    """
+    current = host_info()
+    mismatches = []
+    for section in sorted(
+        {scale if result.per_row else UNSCALED for result in results}
+    ):
+        host = baselines.get(section, {}).get("host")
+        if host is None or host == current:
+            continue
+
+        differences = ", ".join(
+            f"{key} {host.get(key)!r} != {value!r}"
+            for key, value in current.items()
+            if host.get(key) != value
+        )
+        mismatches.append(
+            f"baselines for {section} come from another host: {differences}"
+        )
+    return mismatches
+
+
+def find_regressions(
+    baselines: Dict, scale: str, results: List[BenchmarkResult], tolerance: float
+) -> List[str]:
+    """Returns a message for every benchmark slower than tolerance allows."""
+    regressions = []
+    for result in results:
+        section = scale if result.per_row else UNSCALED
+        baseline = baselines.get(section, {}).get("benchmarks", {}).get(result.name)
+        if not baseline:
+            continue
+
+        if not result.per_row:
+            ceiling = baseline["seconds"] / (1 - tolerance)
+            if result.seconds > ceiling:
+                regressions.append(
+                    f"{result.name}: {result.seconds:.4f}s is above the baseline "
+                    f"of {baseline['seconds']:.4f}s (tolerance {tolerance:.0%})"
+                )
+            continue
+
+        floor = baseline["rows_per_second"] * (1 - tolerance)
+        if result.rows_per_second < floor:
+            regressions.append(
+                f"{result.name}: {result.rows_per_second:,.0f} rows/s is below "
+                f"the baseline of {baseline['rows_per_second']:,.0f} rows/s "
+                f"(tolerance {tolerance:.0%})"
+            )
+    return regressions
@@ -0,0 +1,310 @@
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Optional
+from helpers.instrumentation_helpers import instrument
+from helpers import (
+    PROCESSED_DATA_DIR,
+    PRO_BOMOJO_RELEASES_FILE,
+    PRO_BOMOJO_COUNTRIES_FILE,
+    PRO_BOMOJO_BRANDS_FILE,
+    PRO_BOMOJO_FRANCHISES_FILE,
+    PRO_MOVIES_AWARDS_FILE,
+)
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Processed files exposed under the same table names DATA_loader uses in Snowflake
+SOURCE_TABLES = {
+    "BOMOJO_RELEASES": PRO_BOMOJO_RELEASES_FILE.name,
+    "BOMOJO_COUNTRIES": PRO_BOMOJO_COUNTRIES_FILE.name,
+    "BOMOJO_BRANDS": PRO_BOMOJO_BRANDS_FILE.name,
+    "BOMOJO_FRANCHISES": PRO_BOMOJO_FRANCHISES_FILE.name,
+    "MOVIE_AWARDS": PRO_MOVIES_AWARDS_FILE.name,
+}
+
+# Precomputed joins and rollups in build order: (name, tables it reads, query).
+# Releases are summed per movie first so the joins don't multiply rows. The
+# scraper only writes releases for movies with a "By Release" table, so single
+# release movies take their totals from their countries instead; GROSS_SOURCE
+# tells which table each movie's totals come from.
+MATERIALIZATIONS = [
+    (
+        "MOVIE_RELEASES",
+        {"BOMOJO_RELEASES", "BOMOJO_COUNTRIES"},
+        """
+        WITH RELEASE_TOTALS AS (
+            SELECT
+                IMDB_ID,
+                COUNT(*) AS RELEASE_GROUPS,
+                SUM(DOMESTIC)::BIGINT AS DOMESTIC,
+                SUM(INTERNATIONAL)::BIGINT AS INTERNATIONAL,
+                SUM(WORLDWIDE)::BIGINT AS WORLDWIDE
+            FROM BOMOJO_RELEASES
+            GROUP BY IMDB_ID
+        ),
+        COUNTRY_TOTALS AS (
+            SELECT
+                IMDB_ID,
+                1 AS RELEASE_GROUPS,
+                SUM(CASE WHEN REGION = 'DOMESTIC' THEN LIFETIME_GROSS ELSE 0 END)
+                    ::BIGINT AS DOMESTIC,
+                SUM(CASE WHEN REGION != 'DOMESTIC' THEN LIFETIME_GROSS ELSE 0 END)
+                    ::BIGINT AS INTERNATIONAL,
+                SUM(LIFETIME_GROSS)::BIGINT AS WORLDWIDE
+            FROM BOMOJO_COUNTRIES
+            GROUP BY IMDB_ID
+        )
+        SELECT *, 'BOMOJO_RELEASES' AS GROSS_SOURCE FROM RELEASE_TOTALS
+        UNION ALL
+        SELECT *, 'BOMOJO_COUNTRIES' AS GROSS_SOURCE FROM COUNTRY_TOTALS
+        WHERE IMDB_ID NOT IN (
+            SELECT IMDB_ID FROM RELEASE_TOTALS WHERE IMDB_ID IS NOT NULL
+        )
+        """,
+    ),
+    (
+        "COUNTRIES_RELEASES",
+        {"BOMOJO_COUNTRIES", "MOVIE_RELEASES"},
+        """
+        SELECT
+            C.IMDB_ID,
+            C.AREA,
+            C.REGION,
+            C.RELEASES,
+            C.LIFETIME_GROSS,
+            R.RELEASE_GROUPS,
+            R.DOMESTIC,
+            R.INTERNATIONAL,
+            R.WORLDWIDE,
+            R.GROSS_SOURCE
+        FROM BOMOJO_COUNTRIES C
+        LEFT JOIN MOVIE_RELEASES R ON C.IMDB_ID = R.IMDB_ID
+        """,
+    ),
+    (
+        "FRANCHISES_RELEASES",
+        {"BOMOJO_FRANCHISES", "MOVIE_RELEASES"},
+        """
+        SELECT
+            F.FRANCHISE,
+            F.IMDB_ID,
+            R.RELEASE_GROUPS,
+            R.DOMESTIC,
+            R.INTERNATIONAL,
+            R.WORLDWIDE,
+            R.GROSS_SOURCE
+        FROM BOMOJO_FRANCHISES F
+        LEFT JOIN MOVIE_RELEASES R ON F.IMDB_ID = R.IMDB_ID
+        """,
+    ),
+    (
+        "BRANDS_RELEASES",
+        {"BOMOJO_BRANDS", "MOVIE_RELEASES"},
+        """
+        SELECT
+            B.BRAND,
+            B.IMDB_ID,
+            R.RELEASE_GROUPS,
+            R.DOMESTIC,
+            R.INTERNATIONAL,
+            R.WORLDWIDE,
+            R.GROSS_SOURCE
+        FROM BOMOJO_BRANDS B
+        LEFT JOIN MOVIE_RELEASES R ON B.IMDB_ID = R.IMDB_ID
+        """,
+    ),
+    (
+        "GROSS_BY_REGION",
+        {"BOMOJO_COUNTRIES"},
+        """
+        SELECT
+            REGION,
+            COUNT(DISTINCT IMDB_ID) AS MOVIES,
+            SUM(LIFETIME_GROSS)::BIGINT AS LIFETIME_GROSS
+        FROM BOMOJO_COUNTRIES
+        GROUP BY REGION
+        """,
+    ),
+    (
+        "GROSS_BY_FRANCHISE",
+        {"FRANCHISES_RELEASES"},
+        """
+        SELECT
+            FRANCHISE,
+            COUNT(DISTINCT IMDB_ID) AS MOVIES,
+            COUNT(DISTINCT CASE WHEN WORLDWIDE IS NULL THEN IMDB_ID END)
+                AS MOVIES_WITHOUT_GROSS,
+            SUM(DOMESTIC)::BIGINT AS DOMESTIC,
+            SUM(INTERNATIONAL)::BIGINT AS INTERNATIONAL,
+            SUM(WORLDWIDE)::BIGINT AS WORLDWIDE
+        FROM FRANCHISES_RELEASES
+        GROUP BY FRANCHISE
+        """,
+    ),
+    (
+        "GROSS_BY_BRAND",
+        {"BRANDS_RELEASES"},
+        """
+        SELECT
+            BRAND,
+            COUNT(DISTINCT IMDB_ID) AS MOVIES,
+            COUNT(DISTINCT CASE WHEN WORLDWIDE IS NULL THEN IMDB_ID END)
+                AS MOVIES_WITHOUT_GROSS,
+            SUM(DOMESTIC)::BIGINT AS DOMESTIC,
+            SUM(INTERNATIONAL)::BIGINT AS INTERNATIONAL,
+            SUM(WORLDWIDE)::BIGINT AS WORLDWIDE
+        FROM BRANDS_RELEASES
+        GROUP BY BRAND
+        """,
+    ),
+]
+
+
+@dataclass
+class LocalQueryEngine:
+    """
+    DuckDB engine over the processed Parquet files with the same
+    execute_query API as SnowflakeDatabase. Materialized tables and query
+    results are rebuilt when any of the Parquet files changes.
+    """
+
+    processed_dir: Path = field(default_factory=lambda: PROCESSED_DATA_DIR)
+    cache_file: Optional[Path] = None
+    max_cached_queries: int = 128
+    conn: any = field(init=False)
+
+    def __post_init__(self):
+        self.processed_dir = Path(self.processed_dir)
+        if self.cache_file is None:
+            self.cache_file = self.processed_dir / "QUERY_CACHE.duckdb"
+
+        self._results: OrderedDict = OrderedDict()
+        self._fingerprint: Optional[str] = None
+        self.conn = self._connect()
+        self._refresh_if_changed()
+
+    def _connect(self):
+        try:
+            import duckdb
+        except ImportError as e:
+            raise ImportError(
+                "duckdb is required for the local query engine, install it with "
+                "`poetry install --with query`"
+            ) from e
+
+        try:
+            conn = duckdb.connect(str(self.cache_file))
+            logging.info(f"Connected to the local query cache {self.cache_file}.")
+        except duckdb.IOException as e:
+            # Another process holds the file lock, the cache just won't persist
+            logging.warning(
+                f"Query cache {self.cache_file} is not available ({e}), "
+                "using an in-memory cache."
+            )
+            conn = duckdb.connect()
+        return conn
+
+    def _source_files(self) -> Dict[str, Path]:
+        source_files = {}
+        for table_name, file_name in SOURCE_TABLES.items():
+            file_path = self.processed_dir / file_name
+            if file_path.exists():
+                source_files[table_name] = file_path
+        return source_files
+
+    def _current_fingerprint(self) -> str:
+        # Changing a materialization also invalidates caches built by older code
+        fingerprint = {"MATERIALIZATIONS": [query for _, _, query in MATERIALIZATIONS]}
+        for table_name, file_path in self._source_files().items():
+            stat = file_path.stat()
+            fingerprint[table_name] = [str(file_path), stat.st_mtime_ns, stat.st_size]
+        return json.dumps(fingerprint, sort_keys=True)
+
+    def _refresh_if_changed(self) -> None:
+        fingerprint = self._current_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+
+        self._results.clear()
+        source_files = self._source_files()
+
+        for table_name in SOURCE_TABLES:
+            if table_name in source_files:
+                path = str(source_files[table_name]).replace("'", "''")
+                self.conn.execute(
+                    f"CREATE OR REPLACE VIEW {table_name} AS "
+                    f"SELECT * FROM read_parquet('{path}')"
+                )
+            else:
+                self.conn.execute(f"DROP VIEW IF EXISTS {table_name}")
+
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS CACHE_STATE (FINGERPRINT VARCHAR)"
+        )
+        stored = self.conn.execute("SELECT FINGERPRINT FROM CACHE_STATE").fetchone()
+        if stored and stored[0] == fingerprint:
+            logging.info("Materialized tables are up to date.")
+        else:
+            self._materialize(set(source_files))
+            self.conn.execute("DELETE FROM CACHE_STATE")
+            self.conn.execute("INSERT INTO CACHE_STATE VALUES (?)", [fingerprint])
+
+        self._fingerprint = fingerprint
+
+    def _materialize(self, available: set) -> None:
+        for table_name, dependencies, query in MATERIALIZATIONS:
+            if dependencies <= available:
+                self.conn.execute(f"CREATE OR REPLACE TABLE {table_name} AS {query}")
+                available.add(table_name)
+                logging.info(f"Materialized {table_name}.")
+            else:
+                self.conn.execute(f"DROP TABLE IF EXISTS {table_name}")
+                missing = ", ".join(dependencies - available)
+                logging.info(f"Skipped {table_name}, missing {missing}.")
+
+    def refresh(self) -> None:
+        """Forces the materialized tables and the result cache to be rebuilt."""
+        self.conn.execute("DROP TABLE IF EXISTS CACHE_STATE")
+        self._fingerprint = None
+        self._refresh_if_changed()
+
+    @instrument()
+    def execute_query(self, query: str) -> pd.DataFrame:
+        try:
+            self._refresh_if_changed()
+
+            key = " ".join(query.split())
+            cacheable = key.upper().startswith(("SELECT", "WITH"))
+            if cacheable and key in self._results:
+                self._results.move_to_end(key)
+                logging.info("Query served from the local cache.")
+                return self._results[key].copy()
+
+            df = self.conn.execute(query).df()
+            logging.info("Query executed successfully.")
+
+            if cacheable:
+                self._results[key] = df
+                if len(self._results) > self.max_cached_queries:
+                    self._results.popitem(last=False)
+            else:
+                # Statements may change what cached queries would return
+                self._results.clear()
+            return df.copy()
+        except Exception as e:
+            logging.error(f"Failed to execute query: {e}")
+            raise
+
+    def close_connection(self):
+        try:
+            self.conn.close()
+            logging.info("Local query cache connection closed.")
+        except Exception as e:
+            logging.error(f"Failed to close the local query cache connection: {e}")
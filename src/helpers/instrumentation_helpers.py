@@ -0,0 +1,315 @@
+import os
+import sys
+import json
+import time
+import logging
+import threading
+from pathlib import Path
+from functools import wraps
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+# Upper bounds (in seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+
+
+def get_peak_rss() -> Optional[int]:
+    # High-water mark of the whole process, it never goes down
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports the value in kilobytes, macOS in bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+@dataclass
+class StageMetrics:
+    name: str
+    count: int = 0
+    errors: int = 0
+    total_seconds: float = 0.0
+    min_seconds: Optional[float] = None
+    max_seconds: float = 0.0
+    bytes: int = 0
+    rows: int = 0
+    # Largest amount a single call raised the process peak RSS by
+    peak_rss_growth_bytes: Optional[int] = None
+    # Process peak RSS when the stage last ended, including earlier stages
+    process_peak_rss_bytes: Optional[int] = None
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+    def observe(
+        self,
+        seconds: float,
+        rows: int,
+        nbytes: int,
+        failed: bool,
+        start_peak_rss: Optional[int] = None,
+    ) -> None:
+        self.count += 1
+        self.errors += int(failed)
+        self.total_seconds += seconds
+        self.min_seconds = (
+            seconds if self.min_seconds is None else min(self.min_seconds, seconds)
+        )
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.rows += rows
+        self.bytes += nbytes
+        self.process_peak_rss_bytes = get_peak_rss()
+        if start_peak_rss is not None and self.process_peak_rss_bytes is not None:
+            growth = self.process_peak_rss_bytes - start_peak_rss
+            self.peak_rss_growth_bytes = max(self.peak_rss_growth_bytes or 0, growth)
+
+        for index, upper_bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= upper_bound:
+                self.buckets[index] += 1
+                break
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.total_seconds if self.total_seconds else 0.0
+
+    def to_dict(self) -> Dict:
+        cumulative = 0
+        histogram = {}
+        for upper_bound, bucket_count in zip(LATENCY_BUCKETS, self.buckets):
+            cumulative += bucket_count
+            histogram[str(upper_bound)] = cumulative
+        histogram["+Inf"] = self.count
+
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "total_seconds": self.total_seconds,
+            "mean_seconds": self.total_seconds / self.count if self.count else 0.0,
+            "min_seconds": self.min_seconds,
+            "max_seconds": self.max_seconds,
+            "latency_histogram": histogram,
+            "bytes": self.bytes,
+            "rows": self.rows,
+            "rows_per_second": self.rows_per_second,
+            "peak_rss_growth_bytes": self.peak_rss_growth_bytes,
+            "process_peak_rss_bytes": self.process_peak_rss_bytes,
+        }
+
+
+class MetricsRegistry:
+    """
+    Collects per-stage latency, bytes, rows and peak RSS growth. Stages can be
+    nested; add_rows/add_bytes/mark_failed apply to the innermost active stage
+    of the current thread. Peak RSS growth is how much a stage raised the process
+    high-water mark, so a stage that stays below an earlier peak reports 0, and
+    stages running concurrently share the growth.
+    """
+
+    def __init__(self):
+        self._stages: Dict[str, StageMetrics] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _active_frames(self) -> List[Dict]:
+        if not hasattr(self._local, "frames"):
+            self._local.frames = []
+        return self._local.frames
+
+    @contextmanager
+    def measure(self, stage: str):
+        frame = {"rows": 0, "bytes": 0, "failed": False}
+        frames = self._active_frames()
+        frames.append(frame)
+        failed = False
+        start_peak_rss = get_peak_rss()
+        start = time.perf_counter()
+        try:
+            yield frame
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            frames.pop()
+            with self._lock:
+                metrics = self._stages.setdefault(stage, StageMetrics(stage))
+                metrics.observe(
+                    elapsed,
+                    frame["rows"],
+                    frame["bytes"],
+                    failed or frame["failed"],
+                    start_peak_rss,
+                )
+
+    def add_rows(self, rows: int) -> None:
+        frames = self._active_frames()
+        if frames:
+            frames[-1]["rows"] += rows
+
+    def add_bytes(self, nbytes: int) -> None:
+        frames = self._active_frames()
+        if frames:
+            frames[-1]["bytes"] += nbytes
+
+    def mark_failed(self) -> None:
+        # For stages that handle their own errors instead of raising
+        frames = self._active_frames()
+        if frames:
+            frames[-1]["failed"] = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stages.clear()
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {name: stage.to_dict() for name, stage in self._stages.items()}
+
+    def to_prometheus(self) -> str:
+        stages = self.to_dict()
+        lines = [
+            "# HELP etl_stage_duration_seconds Latency of each pipeline stage.",
+            "# TYPE etl_stage_duration_seconds histogram",
+        ]
+        for name, stage in stages.items():
+            labels = f'stage="{name}"'
+            for upper_bound, bucket_count in stage["latency_histogram"].items():
+                lines.append(
+                    f'etl_stage_duration_seconds_bucket{{{labels},le="{upper_bound}"}} '
+                    f"{bucket_count}"
+                )
+            lines.append(
+                f"etl_stage_duration_seconds_sum{{{labels}}} {stage['total_seconds']}"
+            )
+            lines.append(
+                f"etl_stage_duration_seconds_count{{{labels}}} {stage['count']}"
+            )
+
+        gauges = [
+            ("etl_stage_errors_total", "counter", "errors", "Failed calls per stage."),
+            ("etl_stage_bytes_total", "counter", "bytes", "Bytes fetched per stage."),
+            ("etl_stage_rows_total", "counter", "rows", "Rows handled per stage."),
+            (
+                "etl_stage_rows_per_second",
+                "gauge",
+                "rows_per_second",
+                "Row throughput per stage.",
+            ),
+            (
+                "etl_stage_peak_rss_growth_bytes",
+                "gauge",
+                "peak_rss_growth_bytes",
+                "Largest increase of the process peak RSS during one call.",
+            ),
+            (
+                "etl_stage_process_peak_rss_bytes",
+                "gauge",
+                "process_peak_rss_bytes",
+                "Process peak RSS at the end of the stage, including earlier stages.",
+            ),
+        ]
+        for metric, metric_type, key, description in gauges:
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} {metric_type}")
+            for name, stage in stages.items():
+                if stage[key] is not None:
+                    lines.append(f'{metric}{{stage="{name}"}} {stage[key]}')
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, file_path: str) -> None:
+        """Writes Prometheus text for .prom/.txt files and JSON otherwise."""
+        path = Path(file_path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix in (".prom", ".txt"):
+            path.write_text(self.to_prometheus(), encoding="utf-8")
+        else:
+            path.write_text(json.dumps(self.to_dict(), indent=2), encoding="utf-8")
+
+
+METRICS = MetricsRegistry()
+
+
+def measure(stage: str):
+    return METRICS.measure(stage)
+
+
+def add_rows(rows: int) -> None:
+    METRICS.add_rows(rows)
+
+
+def add_bytes(nbytes: int) -> None:
+    METRICS.add_bytes(nbytes)
+
+
+def mark_failed() -> None:
+    METRICS.mark_failed()
+
+
+def _count_rows(result, args, kwargs) -> int:
+    # DataFrames (returned or received) are counted without importing pandas
+    if hasattr(result, "shape"):
+        return len(result)
+    for value in list(args) + list(kwargs.values()):
+        if hasattr(value, "shape"):
+            return len(value)
+    return 0
+
+
+def instrument(stage: Optional[str] = None) -> Callable:
+    """
+    Decorator that records the wrapped call as a stage. When the function does
+    not report rows itself, the length of the returned DataFrame (or of the
+    first DataFrame argument) is used.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        stage_name = stage or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with METRICS.measure(stage_name) as frame:
+                result = func(*args, **kwargs)
+                if not frame["rows"]:
+                    frame["rows"] = _count_rows(result, args, kwargs)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def dump_metrics(name: str) -> None:
+    """
+    Writes the collected metrics to the path in the METRICS_FILE environment
+    variable, if set. A {name} placeholder in the path is replaced by name,
+    other braces are kept as they are.
+    """
+    metrics_file = os.getenv("METRICS_FILE")
+    if not metrics_file:
+        return
+
+    file_path = metrics_file.replace("{name}", name)
+    try:
+        METRICS.write(file_path)
+        logging.info(f"Metrics written to {file_path}")
+    except (IOError, OSError) as e:
+        logging.error(f"Error writing metrics file {file_path}: {e}")
@@ -0,0 +1,192 @@
+import os
+import time
+import logging
+import threading
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator, Optional
+from helpers.instrumentation_helpers import measure, add_bytes
+
+
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+@dataclass
+class AdaptiveScheduler:
+    """
+    AIMD politeness scheduler. The number of in-flight requests grows by one
+    per window of successful responses and is cut by decrease_factor when the
+    server answers 429/503, fails, or slows down beyond latency_threshold
+    times the fastest smoothed latency of the last latency_window responses,
+    so the base follows the site and the mix of pages being fetched.
+    """
+
+    max_concurrency: int = 8
+    min_delay: float = 0.1
+    initial_concurrency: float = 1.0
+    decrease_factor: float = 0.5
+    latency_threshold: float = 2.0
+    latency_window: int = 100
+    backoff: float = 5.0
+    max_retries: int = 3
+    timeout: float = 30.0
+    limit: float = field(init=False)
+
+    def __post_init__(self):
+        self.limit = min(float(self.initial_concurrency), self.max_concurrency)
+        self.lowest_limit = self.limit
+        self.in_flight = 0
+        self.smoothed_latency: Optional[float] = None
+        self.base_latency: Optional[float] = None
+        self._recent_latencies = deque(maxlen=self.latency_window)
+        self._last_start = 0.0
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._condition = threading.Condition()
+        self._sessions = threading.local()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveScheduler":
+        return cls(
+            max_concurrency=int(os.getenv("SCRAPER_MAX_CONCURRENCY", "8")),
+            min_delay=float(os.getenv("SCRAPER_MIN_DELAY", "0.1")),
+        )
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._sessions, "session"):
+            self._sessions.session = requests.Session()
+        return self._sessions.session
+
+    def acquire(self) -> None:
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                wait = max(
+                    self._paused_until - now, self._last_start + self.min_delay - now
+                )
+                if self.in_flight < int(self.limit) and wait <= 0:
+                    break
+                self._condition.wait(timeout=wait if wait > 0 else None)
+
+            self.in_flight += 1
+            self._last_start = time.monotonic()
+
+    def release(
+        self,
+        latency: float,
+        throttled: bool = False,
+        failed: bool = False,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        with self._condition:
+            self.in_flight -= 1
+
+            if throttled:
+                self._paused_until = time.monotonic() + (retry_after or self.backoff)
+                self._decrease(f"throttled, pausing {retry_after or self.backoff:.1f}s")
+            elif failed:
+                self._decrease("request failed")
+            else:
+                self._observe_latency(latency)
+                if self.smoothed_latency > self.latency_threshold * self.base_latency:
+                    self._decrease(
+                        f"latency {self.smoothed_latency:.3f}s above "
+                        f"{self.latency_threshold:.1f}x base {self.base_latency:.3f}s"
+                    )
+                else:
+                    self._increase()
+
+            self._condition.notify_all()
+
+    def _observe_latency(self, latency: float) -> None:
+        if self.smoothed_latency is None:
+            self.smoothed_latency = latency
+        else:
+            self.smoothed_latency = 0.8 * self.smoothed_latency + 0.2 * latency
+
+        self._recent_latencies.append(self.smoothed_latency)
+        self.base_latency = min(self._recent_latencies)
+
+    def _increase(self) -> None:
+        previous = self.limit
+        self.limit = min(self.limit + 1 / self.limit, float(self.max_concurrency))
+        if int(self.limit) != int(previous):
+            logging.info(f"Scheduler: concurrency increased to {int(self.limit)}")
+
+    def _decrease(self, reason: str) -> None:
+        # Only cut once per smoothed round trip, responses already in flight
+        # reflect the previous limit
+        now = time.monotonic()
+        if now - self._last_decrease < (self.smoothed_latency or 0.0):
+            return
+
+        previous = self.limit
+        self.limit = max(self.limit * self.decrease_factor, 1.0)
+        self.lowest_limit = min(self.lowest_limit, self.limit)
+        self._last_decrease = now
+        logging.info(
+            f"Scheduler: {reason}, concurrency decreased "
+            f"from {int(previous)} to {int(self.limit)}"
+        )
+
+    def get(self, url: str) -> requests.Response:
+        """
+        GET request scheduled under the current limit. Throttled responses are
+        retried up to max_retries times, the last response is returned otherwise.
+        """
+        for attempt in range(self.max_retries + 1):
+            # Waiting for a slot (and Retry-After pauses) is kept out of the
+            # server latency
+            with measure("AdaptiveScheduler.wait"):
+                self.acquire()
+            start = time.monotonic()
+            try:
+                with measure("AdaptiveScheduler.response"):
+                    response = self._session().get(url, timeout=self.timeout)
+                    add_bytes(len(response.content))
+            except requests.exceptions.RequestException:
+                self.release(time.monotonic() - start, failed=True)
+                raise
+
+            latency = time.monotonic() - start
+            if response.status_code in THROTTLE_STATUS_CODES:
+                self.release(
+                    latency,
+                    throttled=True,
+                    retry_after=parse_retry_after(response.headers.get("Retry-After")),
+                )
+                if attempt < self.max_retries:
+                    logging.info(f"Scheduler: retrying {url} after throttling")
+                    continue
+            else:
+                self.release(latency, failed=response.status_code >= 500)
+
+            return response
+
+    def map(self, func: Callable, items: Iterable) -> Iterator:
+        """
+        Applies func to every item from max_concurrency threads, keeping order.
+        The threads (and their sessions) are kept for later calls, func must
+        not call map itself.
+        """
+        with self._condition:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        return self._executor.map(func, items)
+
+    def close(self) -> None:
+        with self._condition:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    # Only the delay-seconds form is supported, HTTP dates fall back to backoff
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
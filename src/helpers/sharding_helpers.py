@@ -0,0 +1,236 @@
+import os
+import time
+import socket
+import hashlib
+import logging
+import sqlite3
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional
+
+
+def shard_of(key: str, shard_count: int) -> int:
+    # Python's hash() is salted per process, a digest is stable across workers and hosts
+    digest = hashlib.sha1(str(key).encode("utf-8")).hexdigest()
+    return int(digest, 16) % shard_count
+
+
+def part_file(file_path: Path, shard: int, shard_count: int, owner: str) -> Path:
+    # The owner keeps a worker that lost its lease from writing into the file of
+    # the worker that reclaimed the shard
+    file_path = Path(file_path)
+    return file_path.with_name(
+        f"{file_path.stem}.part-{shard:05d}-of-{shard_count:05d}.{owner}"
+        f"{file_path.suffix}"
+    )
+
+
+def merge_part_files(file_path: Path, shard_count: int, owners: Dict[int, str]) -> int:
+    """
+    Appends the part CSV written by the owner of each completed shard into
+    file_path, keeping a single header, and removes all parts of file_path,
+    including those left by workers that lost their lease. Returns the number
+    of merged parts.
+    """
+    file_path = Path(file_path)
+    parts = [
+        part_file(file_path, shard, shard_count, owner)
+        for shard, owner in sorted(owners.items())
+        if part_file(file_path, shard, shard_count, owner).exists()
+    ]
+
+    if parts:
+        write_header = not file_path.exists()
+        with open(file_path, "a", encoding="utf-8", newline="") as output:
+            for part in parts:
+                with open(part, "r", encoding="utf-8", newline="") as source:
+                    header = source.readline()
+                    # Shards without results leave a CSV without header behind
+                    if header.strip():
+                        if write_header:
+                            output.write(header)
+                            write_header = False
+                        for line in source:
+                            output.write(line)
+
+                part.unlink()
+        logging.info(f"Merged {len(parts)} part files into {file_path}")
+    else:
+        logging.info(f"No part files to merge into {file_path}")
+
+    for stale_part in file_path.parent.glob(
+        f"{file_path.stem}.part-*-of-{shard_count:05d}.*{file_path.suffix}"
+    ):
+        logging.warning(
+            f"Discarding {stale_part}, written by a worker that lost its lease"
+        )
+        stale_part.unlink()
+
+    return len(parts)
+
+
+@dataclass
+class ShardQueue:
+    """
+    Work queue of shards stored in a SQLite file. Workers claim a shard with a
+    lease and renew it while working; shards whose lease expired (a dead
+    worker) can be claimed again by any other worker.
+    """
+
+    db_file: Path
+    shard_count: int
+    lease_seconds: float = 600.0
+    worker_id: str = field(
+        default_factory=lambda: f"{socket.gethostname()}-{os.getpid()}"
+    )
+
+    def __post_init__(self):
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS shards ("
+                "shard INTEGER PRIMARY KEY, shard_count INTEGER NOT NULL, "
+                "status TEXT NOT NULL, owner TEXT, lease_expires REAL)"
+            )
+            existing = conn.execute(
+                "SELECT DISTINCT shard_count FROM shards"
+            ).fetchall()
+            if existing and existing != [(self.shard_count,)]:
+                raise ValueError(
+                    f"Queue {self.db_file} was created for {existing[0][0]} shards, "
+                    f"not {self.shard_count}"
+                )
+            conn.executemany(
+                "INSERT OR IGNORE INTO shards VALUES (?, ?, 'pending', NULL, NULL)",
+                [(shard, self.shard_count) for shard in range(self.shard_count)],
+            )
+
+    @contextmanager
+    def _connect(self):
+        # A connection per operation keeps the queue usable from the lease thread
+        conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    def claim(self) -> Optional[int]:
+        now = time.time()
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT shard, owner FROM shards WHERE status = 'pending' "
+                "OR (status = 'leased' AND lease_expires < ?) ORDER BY shard LIMIT 1",
+                (now,),
+            ).fetchone()
+            if row is None:
+                return None
+
+            shard, previous_owner = row
+            conn.execute(
+                "UPDATE shards SET status = 'leased', owner = ?, lease_expires = ? "
+                "WHERE shard = ?",
+                (self.worker_id, now + self.lease_seconds, shard),
+            )
+
+        if previous_owner:
+            logging.info(f"Reclaimed shard {shard} from expired owner {previous_owner}")
+        logging.info(
+            f"Worker {self.worker_id} claimed shard {shard} of {self.shard_count}"
+        )
+        return shard
+
+    def renew(self, shard: int) -> bool:
+        """Returns False when the shard has been reclaimed by another worker."""
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE shards SET lease_expires = ? "
+                "WHERE shard = ? AND owner = ? AND status = 'leased'",
+                (time.time() + self.lease_seconds, shard, self.worker_id),
+            ).rowcount
+        return bool(updated)
+
+    def complete(self, shard: int) -> None:
+        with self._connect() as conn:
+            updated = conn.execute(
+                "UPDATE shards SET status = 'done', lease_expires = NULL "
+                "WHERE shard = ? AND owner = ?",
+                (shard, self.worker_id),
+            ).rowcount
+        if not updated:
+            logging.warning(
+                f"Shard {shard} was reclaimed by another worker, "
+                "its output from this worker will be discarded"
+            )
+        else:
+            logging.info(f"Worker {self.worker_id} completed shard {shard}")
+
+    def pending(self) -> List[int]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT shard FROM shards WHERE status != 'done' ORDER BY shard"
+            ).fetchall()
+        return [shard for (shard,) in rows]
+
+    def owners(self) -> Dict[int, str]:
+        """Worker that completed each done shard, whose part files are kept."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT shard, owner FROM shards WHERE status = 'done'"
+            ).fetchall()
+        return dict(rows)
+
+    def next_lease_expiry(self) -> Optional[float]:
+        """Time at which the earliest lease held by any worker expires."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(lease_expires) FROM shards WHERE status = 'leased'"
+            ).fetchone()
+        return row[0]
+
+    @contextmanager
+    def leased(self, shard: int):
+        """Renews the lease of shard in the background while the block runs."""
+        stop = threading.Event()
+
+        def keep_alive():
+            while not stop.wait(self.lease_seconds / 3):
+                try:
+                    if not self.renew(shard):
+                        logging.warning(
+                            f"Lost the lease of shard {shard} to another worker"
+                        )
+                        return
+                except sqlite3.Error as e:
+                    logging.error(f"Error renewing lease of shard {shard}: {e}")
+
+        thread = threading.Thread(target=keep_alive, daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join()
+
+
+def shard_count_of(db_file: Path) -> Optional[int]:
+    if not Path(db_file).exists():
+        return None
+    conn = sqlite3.connect(db_file)
+    try:
+        row = conn.execute("SELECT MAX(shard_count) FROM shards").fetchone()
+    finally:
+        conn.close()
+    return row[0] if row else None
+
+
+def remove_part_files(
+    file_paths: Iterable[Path], shard: int, shard_count: int, owner: str
+) -> None:
+    for file_path in file_paths:
+        part_file(file_path, shard, shard_count, owner).unlink(missing_ok=True)
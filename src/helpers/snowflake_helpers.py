@@ -1,9 +1,15 @@
-import os
+from __future__ import annotations
+
+import queue
 import logging
-import pandas as pd
-import snowflake.connector
+import threading
 from contextlib import contextmanager
 from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, List
+from helpers.instrumentation_helpers import instrument
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 @dataclass
@@ -20,6 +26,9 @@ class SnowflakeDatabase:
         self.conn = self._connect()
 
     def _connect(self):
+        # The connector is slow to import, only load it when a connection is needed
+        import snowflake.connector
+
         try:
             conn = snowflake.connector.connect(
                 user=self.user,
@@ -52,6 +61,8 @@ class SnowflakeDatabase:
             cursor.close()
 
     def execute_query(self, query: str) -> pd.DataFrame:
+        import pandas as pd
+
         try:
             with self.managed_cursor() as cur:
                 cur.execute(query)
@@ -64,14 +75,25 @@ class SnowflakeDatabase:
             logging.error(f"Failed to execute query: {e}")
             raise
 
-    def load_data(self, df: pd.DataFrame, table_name: str) -> None:
+    @instrument()
+    def load_data(
+        self, df: pd.DataFrame, table_name: str, batch_size: int = 100_000
+    ) -> None:
+        placeholders = ",".join(["%s"] * len(df.columns))
+        query = f"INSERT INTO {table_name} VALUES ({placeholders})"
         try:
             with self.managed_cursor() as cur:
-                cur.executemany(
-                    f"INSERT INTO {table_name} VALUES ({','.join(['%s'] * len(df.columns))})",
-                    df.values.tolist(),
-                )
-                cur.execute("COMMIT")
+                # Rows are turned into Python lists a batch at a time, a whole table
+                # at once doesn't fit in memory; one transaction keeps it atomic
+                cur.execute("BEGIN")
+                try:
+                    for start in range(0, len(df), batch_size):
+                        batch = df.iloc[start : start + batch_size]
+                        cur.executemany(query, batch.values.tolist())
+                    cur.execute("COMMIT")
+                except Exception:
+                    cur.execute("ROLLBACK")
+                    raise
             logging.info("Data loaded successfully.")
         except Exception as e:
             logging.error(f"Failed to load data into {table_name}: {e}")
@@ -83,3 +105,55 @@ class SnowflakeDatabase:
             logging.info("Database connection closed.")
         except Exception as e:
             logging.error(f"Failed to close the database connection: {e}")
+
+
+class SnowflakeConnectionPool:
+    """
+    Opens up to size connections on demand and hands each one to a single
+    thread at a time, so concurrent loads don't pay a handshake per table.
+    """
+
+    def __init__(self, connect: Callable[[], SnowflakeDatabase], size: int):
+        self.size = size
+        self._connect = connect
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._opened: List[SnowflakeDatabase] = []
+        self._opening = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self) -> SnowflakeDatabase:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_open = len(self._opened) + self._opening < self.size
+            if can_open:
+                self._opening += 1
+
+        if not can_open:
+            return self._idle.get()
+
+        try:
+            db = self._connect()
+        finally:
+            with self._lock:
+                self._opening -= 1
+
+        with self._lock:
+            self._opened.append(db)
+        return db
+
+    @contextmanager
+    def connection(self):
+        db = self._acquire()
+        try:
+            yield db
+        finally:
+            self._idle.put(db)
+
+    def close_all(self) -> None:
+        for db in self._opened:
+            db.close_connection()
+        logging.info(f"Closed {len(self._opened)} pooled database connections.")
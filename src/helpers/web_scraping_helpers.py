@@ -1,9 +1,17 @@
-import pandas as pd
-from bs4 import Tag
-from typing import List
+from __future__ import annotations
 
+from typing import TYPE_CHECKING, List
+from helpers.instrumentation_helpers import instrument
 
+if TYPE_CHECKING:
+    import pandas as pd
+    from bs4 import Tag
+
+
+@instrument()
 def table_to_dataframe(table: List[Tag], header_row_index: int = 0) -> pd.DataFrame:
+    import pandas as pd
+
     data = []
     for row in table:
         cols = row.find_all(["th", "td"])
@@ -17,6 +25,8 @@ def table_to_dataframe(table: List[Tag], header_row_index: int = 0) -> pd.DataFr
 
 
 def get_href_table(soup: List[Tag], key_word: str) -> pd.DataFrame:
+    import pandas as pd
+
     data = []
 
     for link in soup.find_all("a", {"class": "a-link-normal"}):